@@ -2,8 +2,14 @@ import discord
 import config
 import os
 import asyncio
+from discord import app_commands
 from discord.ext import commands
 from pathlib import Path
+from lib.dbbreaker import DatabaseUnavailable
+import lib.asyncdb as asyncdb
+import lib.dbfuncs as dbfuncs
+import lib.httpclient as httpclient
+from lib.maintenance import send_degraded
 
 ########################################
 intents = discord.Intents.default()
@@ -20,6 +26,21 @@ async def on_ready():
     print(f"Logged in as {bot.user}")
 
 
+@bot.event
+async def setup_hook():
+    await httpclient.start()
+
+
+@bot.tree.error
+async def on_app_command_error(interaction, error):
+    original = getattr(error, "original", error)
+    if isinstance(original, DatabaseUnavailable):
+        print(f"[DB] /{getattr(interaction.command, 'name', '?')} failed: {original}")
+        await send_degraded(interaction)
+        return
+    await app_commands.CommandTree.on_error(bot.tree, interaction, error)
+
+
 @bot.event
 async def load():
     for file in Path(__file__).parent.glob("cogs/*.py"):
@@ -31,7 +52,14 @@ async def main():
 
     ########################################
     # START BOT
-    await bot.start(config.TOKEN)
+    try:
+        # closing the bot unloads the cogs, which flush what they buffered
+        async with bot:
+            await bot.start(config.TOKEN)
+    finally:
+        await httpclient.close()
+        asyncdb.shutdown()
+        dbfuncs.close_pool()
     ########################################
 
 
@@ -2,9 +2,10 @@ import typing
 import discord
 from discord.ext import commands
 from discord import app_commands
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 from lib.dbfuncs import track_queries
 from lib.maintenance import maintenance_check
+from lib.admin import admin_check
 
 class AdminPoints(commands.Cog):
     def __init__(self, bot):
@@ -21,6 +22,7 @@ class AdminPoints(commands.Cog):
     @app_commands.describe(leetcode_user="leetcode user to add points")
     @app_commands.describe(points="points to add")
     @track_queries
+    @admin_check()
     @maintenance_check()
     async def adminpoints(
         self,
@@ -30,35 +32,29 @@ class AdminPoints(commands.Cog):
         points: int,
     ):
         await interaction.response.defer()
-        admins = dbfuncs.get_admins()
-        admins = set([admin[0] for admin in admins])
-        if interaction.user.id in admins:
-            if not discord_user and not leetcode_user:
-                await interaction.followup.send(
-                    "Provide a valid user (leetcode or discord)"
-                )
+        if not discord_user and not leetcode_user:
+            await interaction.followup.send(
+                "Provide a valid user (leetcode or discord)"
+            )
+            return
+        if discord_user:
+            if not await asyncdb.check_discord_user(discord_user):
+                out = f"Discord user {discord_user} not registered"
+                await interaction.followup.send(out)
                 return
-            if discord_user:
-                if not dbfuncs.check_discord_user(discord_user):
-                    out = f"Discord user {discord_user} not registered"
-                    await interaction.followup.send(out)
-                    return
-                dbfuncs.add_points(discord_user, None, points)
-                await interaction.followup.send(
-                    f"Added {points} points to {discord_user} by discord user"
-                )
-            else:
-                if not dbfuncs.check_leetcode_user(leetcode_user):
-                    out = f"User {leetcode_user} not registered"
-                    await interaction.followup.send(out)
-                    return
-                dbfuncs.add_points(None, leetcode_user, points)
-                await interaction.followup.send(
-                    f"Added {points} points to {leetcode_user} by leetcode user"
-                )
-
+            await asyncdb.add_points(discord_user, None, points)
+            await interaction.followup.send(
+                f"Added {points} points to {discord_user} by discord user"
+            )
         else:
-            await interaction.followup.send("You are not an admin")
+            if not await asyncdb.check_leetcode_user(leetcode_user):
+                out = f"User {leetcode_user} not registered"
+                await interaction.followup.send(out)
+                return
+            await asyncdb.add_points(None, leetcode_user, points)
+            await interaction.followup.send(
+                f"Added {points} points to {leetcode_user} by leetcode user"
+            )
 
 
 async def setup(bot):
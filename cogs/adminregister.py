@@ -2,8 +2,10 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from lib.dbfuncs import track_queries
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
+from lib.dbbreaker import DatabaseUnavailable
 from lib.maintenance import maintenance_check
+from lib.admin import admin_check
 
 
 class AdminRegister(commands.Cog):
@@ -18,6 +20,7 @@ class AdminRegister(commands.Cog):
     @app_commands.describe(discord_user="discord user to register")
     @app_commands.describe(leetcode_user="leetcode user to register")
     # @track_queries
+    @admin_check()
     @maintenance_check()
     async def adminregister(
         self,
@@ -27,35 +30,29 @@ class AdminRegister(commands.Cog):
         leetcode_user: str,
     ):
         await interaction.response.defer()
-        admins = dbfuncs.get_admins()
-        admins = set([admin[0] for admin in admins])
-        if interaction.user.id in admins:
-            if dbfuncs.check_discord_user(discord_user):
-                out = f"Discord user {discord_user} already registered"
-                lc_user = dbfuncs.get_leetcode_from_discord(discord_user)
-                if lc_user:
-                    out += f" as {lc_user}"
-                await interaction.followup.send(out)
-                return
-
-            if dbfuncs.check_leetcode_user(leetcode_user):
-                out = f"User {leetcode_user} already registered"
-                dc_user = dbfuncs.get_discord_from_leetcode(leetcode_user)
-                if dc_user:
-                    out += f" with Discord: {dc_user}"
-                await interaction.followup.send(out)
-                return
-            try:
-                result = dbfuncs.add_user(discord_user, discord_id, leetcode_user)
-                print(result)
-            except Exception as e:
-                print(e)
-            await interaction.followup.send(
-                f"Registered {discord_user} as {leetcode_user}"
-            )
-
-        else:
-            await interaction.followup.send("You are not an admin")
+        if await asyncdb.check_discord_user(discord_user):
+            out = f"Discord user {discord_user} already registered"
+            lc_user = await asyncdb.get_leetcode_from_discord(discord_user)
+            if lc_user:
+                out += f" as {lc_user}"
+            await interaction.followup.send(out)
+            return
+
+        if await asyncdb.check_leetcode_user(leetcode_user):
+            out = f"User {leetcode_user} already registered"
+            dc_user = await asyncdb.get_discord_from_leetcode(leetcode_user)
+            if dc_user:
+                out += f" with Discord: {dc_user}"
+            await interaction.followup.send(out)
+            return
+        try:
+            result = await asyncdb.add_user(discord_user, discord_id, leetcode_user)
+            print(result)
+        except DatabaseUnavailable:
+            raise
+        except Exception as e:
+            print(e)
+        await interaction.followup.send(f"Registered {discord_user} as {leetcode_user}")
 
 
 async def setup(bot):
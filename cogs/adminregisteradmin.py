@@ -1,9 +1,10 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 from lib.dbfuncs import track_queries
 from lib.maintenance import maintenance_check
+from lib.admin import admin_check
 
 class AdminRegisterAdmin(commands.Cog):
     def __init__(self, bot):
@@ -18,25 +19,22 @@ class AdminRegisterAdmin(commands.Cog):
     )
     @app_commands.describe(discord_id="discord ID to register")
     @track_queries
+    @admin_check()
     @maintenance_check()
     async def adminregisteradmin(
         self, interaction: discord.Interaction, discord_id: str
     ):
         await interaction.response.defer()
         discord_id = int(discord_id)
-        admins = dbfuncs.get_admins()
-        admins = set([admin[0] for admin in admins])
-        if interaction.user.id in admins:
-            # insert discord_id to admin table
-            if dbfuncs.add_admin(discord_id):
-                await interaction.followup.send(f"Registered {discord_id} as new admin")
-            else:
-                await interaction.followup.send(
-                    f"Failed to register {discord_id} as new admin"
-                )
-
+        # insert discord_id to admin table
+        success, msg = await asyncdb.add_admin(discord_id)
+        if success:
+            await interaction.followup.send(f"Registered {discord_id} as new admin")
         else:
-            await interaction.followup.send("You are not an admin")
+            print(f"[ADMIN] Failed to register {discord_id}: {msg}")
+            await interaction.followup.send(
+                f"Failed to register {discord_id} as new admin"
+            )
 
 
 async def setup(bot):
@@ -1,9 +1,10 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 from lib.dbfuncs import track_queries
 from lib.maintenance import maintenance_check
+from lib.admin import admin_check
 
 
 class AdminRemove(commands.Cog):
@@ -17,27 +18,22 @@ class AdminRemove(commands.Cog):
     @app_commands.command(name="zremove", description="Remove a user (ADMIN ONLY)")
     @app_commands.describe(discord_user="discord user to remove")
     @track_queries
+    @admin_check()
     @maintenance_check()
     async def adminremove(
         self, interaction: discord.Interaction, discord_user: str, discord_id: str
     ):
         await interaction.response.defer()
-        admins = dbfuncs.get_admins()
-        admins = set([admin[0] for admin in admins])
-        if interaction.user.id in admins:
-            if not dbfuncs.check_discord_user(discord_user):
-                out = f"Discord user {discord_user} not registered"
-                await interaction.followup.send(out)
-                return
-
-            result = dbfuncs.remove_user(discord_id)
-            print(result)
-            await interaction.followup.send(
-                f"Removed {discord_user},{discord_id} from leaderboard and database."
-            )
-
-        else:
-            await interaction.followup.send("You are not an admin")
+        if not await asyncdb.check_discord_user(discord_user):
+            out = f"Discord user {discord_user} not registered"
+            await interaction.followup.send(out)
+            return
+
+        result = await asyncdb.remove_user(discord_id)
+        print(result)
+        await interaction.followup.send(
+            f"Removed {discord_user},{discord_id} from leaderboard and database."
+        )
 
 
 async def setup(bot):
@@ -2,9 +2,10 @@ import typing
 import discord
 from discord.ext import commands
 from discord import app_commands
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 from lib.dbfuncs import track_queries
 from lib.maintenance import maintenance_check
+from lib.admin import admin_check
 
 class AdminReset(commands.Cog):
     def __init__(self, bot):
@@ -27,6 +28,7 @@ class AdminReset(commands.Cog):
         ]
     )
     @track_queries
+    @admin_check()
     @maintenance_check()
     async def adminreset(
         self,
@@ -35,19 +37,16 @@ class AdminReset(commands.Cog):
         interval: typing.Optional[app_commands.Choice[str]],
     ):
         await interaction.response.defer()
-        admins = dbfuncs.get_admins()
-        admins = set([admin[0] for admin in admins])
-        if interaction.user.id in admins:
-            if confirmation != "CONFIRM":
-                await interaction.followup.send("No confirmation, reset cancelled")
-                return
-            # dbfuncs.CLEAR_ALL_POINTS(int(interval.value) if interval else None)
-            await interaction.followup.send(
-                f"Leaderboard will reset with the interval of {interval} days"
-            )
-
-        else:
-            await interaction.followup.send("You are not an admin")
+        if confirmation != "CONFIRM":
+            await interaction.followup.send("No confirmation, reset cancelled")
+            return
+        if interval is None:
+            await interaction.followup.send("No interval given, reset cancelled")
+            return
+        await asyncdb.set_reset_interval(int(interval.value))
+        await interaction.followup.send(
+            f"Leaderboard will reset with the interval of {interval.value} days"
+        )
 
 
 async def setup(bot):
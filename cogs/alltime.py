@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import requests
+import lib.httpclient as httpclient
 import datetime
 from lib.dbfuncs import track_queries
 from lib.maintenance import maintenance_check
@@ -27,8 +27,7 @@ class AllTime(commands.Cog):
         await interaction.response.defer()
         try:
             url = f"{config.SERVER_URL}/leaderboard/leaderboard_history"
-            response = requests.get(url)
-            data = response.json()
+            data = await httpclient.get_json(url)
             embed = self.create_detailed_embed(data, interaction.user.name)
 
             view = discord.ui.View(timeout=None)
@@ -2,65 +2,105 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import datetime
-from lib.dbfuncs import track_queries, with_db, add_bookmark
+import lib.dbfuncs as dbfuncs
+from lib.dbfuncs import track_queries, with_db
+import lib.asyncdb as asyncdb
 from lib.maintenance import maintenance_check
 
 
-@with_db
-def get_bookmarks(cursor, discord_id, start=0):
+PAGE_SIZE = 10
+
+
+@with_db(read_only=True)
+def get_bookmarks(cursor, discord_id, after=None, count=False):
+    """One page of bookmarks, newest first, starting after the
+    (saved_at, problem_slug) key `after`. Only counts the total when asked."""
     try:
-        cursor.execute("SELECT id FROM users WHERE discord_id = %s;", (discord_id,))
-        user_row = cursor.fetchone()
-        if not user_row:
+        user_id = dbfuncs.get_user_id(discord_id)
+        if user_id is None:
             return False, "User not found"
 
-        user_id = user_row[0]
-
-        cursor.execute("SELECT COUNT(*) FROM bookmarks WHERE user_id = %s;", (user_id,))
-        total_count = cursor.fetchone()[0]
+        total_count = None
+        if count:
+            cursor.execute(
+                "SELECT COUNT(*) FROM bookmarks WHERE user_id = %s;", (user_id,)
+            )
+            total_count = cursor.fetchone()[0]
 
-        cursor.execute(
-            """
-            SELECT problem_slug
-            FROM bookmarks
-            WHERE user_id = %s
-            ORDER BY saved_at DESC
-            OFFSET %s LIMIT 10;
-            """,
-            (user_id, start),
-        )
-        bookmarks = [row[0] for row in cursor.fetchall()]
+        if after is None:
+            cursor.execute(
+                """
+                SELECT problem_slug, saved_at
+                FROM bookmarks
+                WHERE user_id = %s
+                ORDER BY saved_at DESC, problem_slug DESC
+                LIMIT %s;
+                """,
+                (user_id, PAGE_SIZE),
+            )
+        else:
+            saved_at, problem_slug = after
+            cursor.execute(
+                """
+                SELECT problem_slug, saved_at
+                FROM bookmarks
+                WHERE user_id = %s AND (saved_at, problem_slug) < (%s, %s)
+                ORDER BY saved_at DESC, problem_slug DESC
+                LIMIT %s;
+                """,
+                (user_id, saved_at, problem_slug, PAGE_SIZE),
+            )
+        rows = cursor.fetchall()
+        bookmarks = [row[0] for row in rows]
+        last_key = (rows[-1][1], rows[-1][0]) if rows else None
 
-        return True, (bookmarks, total_count)
+        return True, (bookmarks, total_count, last_key)
 
     except Exception as e:
         return False, str(e)
 
 
+@with_db
+def get_bookmarks_from_primary(cursor, discord_id, after=None, count=False):
+    """get_bookmarks read from the primary, for the page shown right after a
+    write that a lagging replica may not have yet."""
+    return get_bookmarks(discord_id, after, count)
+
+
 @with_db
 def remove_bookmarks_by_indices(cursor, discord_id, indices):
     try:
-        cursor.execute("SELECT id FROM users WHERE discord_id = %s;", (discord_id,))
-        user_row = cursor.fetchone()
-        if not user_row:
+        user_id = dbfuncs.get_user_id(discord_id)
+        if user_id is None:
             return False, "User not found"
-        user_id = user_row[0]
 
-        cursor.execute(
-            "SELECT problem_slug FROM bookmarks WHERE user_id = %s ORDER BY saved_at DESC;",
-            (user_id,),
-        )
-        all_slugs = [row[0] for row in cursor.fetchall()]
-
-        to_remove = [all_slugs[i - 1] for i in indices if 0 < i <= len(all_slugs)]
+        positions = sorted({i for i in indices if i > 0})
+        if not positions:
+            return True, []
 
-        for slug in to_remove:
-            cursor.execute(
-                "DELETE FROM bookmarks WHERE user_id = %s AND problem_slug = %s;",
-                (user_id, slug),
+        # positions are the 1-based numbers shown in the /bookmarks list
+        cursor.execute(
+            """
+            WITH ranked AS (
+                SELECT problem_slug,
+                       ROW_NUMBER() OVER (
+                           ORDER BY saved_at DESC, problem_slug DESC
+                       ) AS position
+                FROM bookmarks
+                WHERE user_id = %(user_id)s
             )
+            DELETE FROM bookmarks
+            WHERE user_id = %(user_id)s
+              AND problem_slug IN (
+                  SELECT problem_slug FROM ranked WHERE position = ANY(%(positions)s)
+              )
+            RETURNING problem_slug;
+            """,
+            {"user_id": user_id, "positions": positions},
+        )
+        removed = [row[0] for row in cursor.fetchall()]
 
-        return True, to_remove
+        return True, removed
     except Exception as e:
         return False, str(e)
 
@@ -90,6 +130,9 @@ class Bookmarks(commands.Cog):
                 self.user_name = user_name
                 self.start = start
                 self.total_count = 0
+                # page_keys[-1] is the key the current page starts after
+                self.page_keys = [None]
+                self.last_key = None
                 self.message = None
 
                 self.add_button = discord.ui.Button(
@@ -124,14 +167,21 @@ class Bookmarks(commands.Cog):
                 self.add_item(self.prev_button)
                 self.add_item(self.next_button)
 
-            async def refresh_embed(self):
-                success, result = get_bookmarks(self.user_id, self.start)
+            async def refresh_embed(self, count=False, after_write=False):
+                success, result = await asyncdb.run(
+                    get_bookmarks_from_primary if after_write else get_bookmarks,
+                    self.user_id,
+                    self.page_keys[-1],
+                    count,
+                )
                 if not success:
                     return await self.message.edit(
                         content=f"Error: {result}", embed=None, view=self
                     )
 
-                bookmarks, self.total_count = result
+                bookmarks, total_count, self.last_key = result
+                if total_count is not None:
+                    self.total_count = total_count
                 embed = discord.Embed(
                     title="Your bookmarked problems:",
                     color=discord.Color.blue(),
@@ -150,17 +200,27 @@ class Bookmarks(commands.Cog):
                 embed.set_footer(text=f"Requested by {self.user_name}")
 
                 self.prev_button.disabled = self.start == 0
-                self.next_button.disabled = self.start + 10 >= self.total_count
+                self.next_button.disabled = self.start + PAGE_SIZE >= self.total_count
 
                 await self.message.edit(embed=embed, view=self)
 
+            async def first_page(self):
+                # after adding or removing, numbering and the total change
+                self.start = 0
+                self.page_keys = [None]
+                await self.refresh_embed(count=True, after_write=True)
+
             async def prev_page(self, interaction: discord.Interaction):
-                self.start = max(0, self.start - 10)
+                if len(self.page_keys) > 1:
+                    self.page_keys.pop()
+                    self.start -= PAGE_SIZE
                 await self.refresh_embed()
                 await interaction.response.defer()
 
             async def next_page(self, interaction: discord.Interaction):
-                self.start += 10
+                if self.last_key is not None:
+                    self.page_keys.append(self.last_key)
+                    self.start += PAGE_SIZE
                 await self.refresh_embed()
                 await interaction.response.defer()
 
@@ -169,7 +229,7 @@ class Bookmarks(commands.Cog):
                     url = discord.ui.TextInput(label="LeetCode problem URL")
 
                     async def on_submit(modal_self, interaction: discord.Interaction):
-                        success, msg = add_bookmark(
+                        success, msg = await asyncdb.add_bookmark(
                             interaction.user.id, str(modal_self.url)
                         )
                         if success:
@@ -177,7 +237,7 @@ class Bookmarks(commands.Cog):
                                 f"✅ Bookmark added for **[{msg}]({modal_self.url})**",
                                 ephemeral=True,
                             )
-                            await self.refresh_embed()
+                            await self.first_page()
                         else:
                             await interaction.response.send_message(
                                 f"❌ Error: {msg}", ephemeral=True
@@ -209,14 +269,14 @@ class Bookmarks(commands.Cog):
                                     "❌ Failed to confirm.", ephemeral=True
                                 )
                                 return
-                            success, result = remove_bookmarks_by_indices(
-                                interaction.user.id, nums
+                            success, result = await asyncdb.run(
+                                remove_bookmarks_by_indices, interaction.user.id, nums
                             )
                             if success:
                                 await interaction.response.send_message(
                                     f"🗑️ Removed: `{', '.join(result)}`", ephemeral=True
                                 )
-                                await self.refresh_embed()
+                                await self.first_page()
                             else:
                                 await interaction.response.send_message(
                                     f"❌ Error: {result}", ephemeral=True
@@ -232,12 +292,14 @@ class Bookmarks(commands.Cog):
             self.bot, interaction.user.id, interaction.user.name, start=0
         )
 
-        success, result = get_bookmarks(interaction.user.id, 0)
+        success, result = await asyncdb.run(
+            get_bookmarks, interaction.user.id, None, True
+        )
         if not success:
             await interaction.followup.send(f"Error: {result}", ephemeral=True)
             return
 
-        bookmarks, total = result
+        bookmarks, total, last_key = result
         embed = discord.Embed(
             title="Your bookmarked problems:",
             color=discord.Color.blue(),
@@ -254,6 +316,9 @@ class Bookmarks(commands.Cog):
 
         embed.set_footer(text=f"Requested by {interaction.user.name}")
         view.total_count = total
+        view.last_key = last_key
+        view.prev_button.disabled = True
+        view.next_button.disabled = total <= PAGE_SIZE
         view.message = await interaction.followup.send(
             embed=embed, ephemeral=True, view=view
         )
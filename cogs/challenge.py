@@ -1,48 +1,32 @@
 import datetime
 import traceback
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from lib.dbfuncs import track_queries
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 import asyncio
-import random
-import requests
+import lib.catalog as catalog
+from lib.challengemonitor import is_solved, monitor
 from typing import Optional
-from lib.maintenance import maintenance_check
+from lib.dbbreaker import DatabaseUnavailable
+from lib.maintenance import maintenance_check, send_degraded
 import config
 
 
 async def get_question(user1, user2, difficulty=None):
-    difficulty_count = {"EASY": 870, "MEDIUM": 1819, "HARD": 817, None: 3506}
-    question_data = None
-    while True:
-        problem_number = random.randint(1, difficulty_count[difficulty])
-        query = f"&difficulty={difficulty}" if difficulty else ""
-        endpoint = (
-            f"{config.LC_SERVER_URL}/problems?limit=1&skip={problem_number}{query}"
-        )
-        question_data = requests.get(endpoint).json()
-
-        if not question_data["problemsetQuestionList"][0][
-            "isPaidOnly"
-        ] and await check_question(user1, user2, question_data):
-            break
-    return question_data["problemsetQuestionList"][0]
-
-
-async def check_question(user1, user2, question):
-    question_title = question["problemsetQuestionList"][0]["title"]
-    if dbfuncs.check_if_user_did_problem(
-        user1, question_title
-    ) or dbfuncs.check_if_user_did_problem(user2, question_title):
-        return False
-    return True
+    """A random free problem neither user has solved, or None."""
+    if not catalog.size():
+        await catalog.refresh()
+    # pick up submissions the web server wrote since the last sync
+    await asyncdb.sync_solved()
+    solved = await asyncdb.get_solved([user1, user2])
+    return catalog.pick(difficulty, exclude_titles=solved)
 
 
 async def check_users_available(user1, user2):
-    user1_status = dbfuncs.check_if_user_busy(user1)
-    user2_status = dbfuncs.check_if_user_busy(user2)
+    user1_status = await asyncdb.check_if_user_busy_by_id(user1)
+    user2_status = await asyncdb.check_if_user_busy_by_id(user2)
     return not user1_status and not user2_status
 
 
@@ -84,15 +68,6 @@ async def check_all_players_joined(msg, author_user, other_user):
     return True
 
 
-async def check_problem_done_usingAPI(user, question_data):
-    url = f"{config.LC_SERVER_URL}/{user}/acSubmission"
-    response = requests.get(url).json()
-    for submission in reversed(response["submission"]):
-        if submission["title"] == question_data["title"]:
-            return submission
-    return None
-
-
 def parse_unix_timestamp(unix_ts):
     return datetime.datetime.fromtimestamp(int(unix_ts))
 
@@ -105,6 +80,52 @@ def extract_submission_time(api_res, fallback_res):
     return None
 
 
+class DoneButton(discord.ui.View):
+    def __init__(self, challenge, timeout):
+        super().__init__(timeout=timeout)
+        self.challenge = challenge
+
+    @discord.ui.button(label="I'm done", style=discord.ButtonStyle.success, emoji="🏁")
+    async def done(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id not in self.challenge.players:
+            await interaction.response.send_message(
+                "This isn't your challenge!", ephemeral=True
+            )
+            return
+        wait = monitor.request_check(self.challenge, interaction.user.id)
+        if wait:
+            await interaction.response.send_message(
+                f"Already checked recently, try again in {wait:.0f}s.",
+                ephemeral=True,
+            )
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            await monitor.tick()
+        except DatabaseUnavailable:
+            await send_degraded(interaction)
+            return
+        except Exception:
+            print("[MONITOR] Requested check failed")
+            traceback.print_exc()
+            await interaction.followup.send(
+                "Couldn't check your submissions right now, please try again shortly!",
+                ephemeral=True,
+            )
+            return
+        if self.challenge.result.done():
+            if is_solved(self.challenge.result.result()):
+                message = "Found a solve, wrapping up the challenge!"
+            else:
+                message = "Time's up! Nobody solved it, wrapping up the challenge."
+            await interaction.followup.send(message, ephemeral=True)
+        else:
+            await interaction.followup.send(
+                "No accepted submission for this problem yet. It can take a minute to show up, so try again shortly!",
+                ephemeral=True,
+            )
+
+
 async def sleep_and_monitor(
     msg, embed, author_user, other_user, time_limit, question_data
 ):
@@ -112,66 +133,60 @@ async def sleep_and_monitor(
     loser = None
     winner_res = None
     loser_res = None
-    minutes = 1
-
-    for _ in range(time_limit // minutes):
-        await asyncio.sleep(minutes * 60)
-
-        author_api_res = await check_problem_done_usingAPI(
-            dbfuncs.get_leetcode_from_discord(author_user.name), question_data
-        )
-        other_api_res = await check_problem_done_usingAPI(
-            dbfuncs.get_leetcode_from_discord(other_user.name), question_data
-        )
 
-        if author_api_res:
-            print(f"[API] {author_user.name}: {author_api_res}")
-        if other_api_res:
-            print(f"[API] {other_user.name}: {other_api_res}")
-
-        author_res = dbfuncs.check_if_user_did_problem(
-            author_user.name, question_data["title"]
-        )
-        other_res = dbfuncs.check_if_user_did_problem(
-            other_user.name, question_data["title"]
-        )
-
-        print(f"[DB] {author_user.name}: {author_res}")
-        print(f"[DB] {other_user.name}: {other_res}")
-
-        author_time = extract_submission_time(author_api_res, author_res)
-        other_time = extract_submission_time(other_api_res, other_res)
-
-        if author_time and other_time:
-            if author_time < other_time:
-                winner, loser = author_user, other_user
-                winner_res, loser_res = (
-                    author_api_res or author_res,
-                    other_api_res or other_res,
-                )
-            elif other_time < author_time:
-                winner, loser = other_user, author_user
-                winner_res, loser_res = (
-                    other_api_res or other_res,
-                    author_api_res or author_res,
-                )
-            else:
-                print("Both submitted at the same time:", author_time)
-            break
-        elif author_time:
+    # the monitor polls every running challenge together and resolves this
+    # once someone has solved the problem or the time limit has passed
+    challenge = monitor.watch(
+        (author_user.id, other_user.id), question_data, time_limit
+    )
+    await msg.edit(
+        embed=embed, view=DoneButton(challenge, timeout=time_limit * 60 + 300)
+    )
+    try:
+        results = await monitor.wait(challenge)
+    finally:
+        await msg.edit(view=None)
+    author_api_res, author_res = results[author_user.id]
+    other_api_res, other_res = results[other_user.id]
+
+    if author_api_res:
+        print(f"[API] {author_user.name}: {author_api_res}")
+    if other_api_res:
+        print(f"[API] {other_user.name}: {other_api_res}")
+
+    print(f"[DB] {author_user.name}: {author_res}")
+    print(f"[DB] {other_user.name}: {other_res}")
+
+    author_time = extract_submission_time(author_api_res, author_res)
+    other_time = extract_submission_time(other_api_res, other_res)
+
+    if author_time and other_time:
+        if author_time < other_time:
             winner, loser = author_user, other_user
             winner_res, loser_res = (
                 author_api_res or author_res,
                 other_api_res or other_res,
             )
-            break
-        elif other_time:
+        elif other_time < author_time:
             winner, loser = other_user, author_user
             winner_res, loser_res = (
                 other_api_res or other_res,
                 author_api_res or author_res,
             )
-            break
+        else:
+            print("Both submitted at the same time:", author_time)
+    elif author_time:
+        winner, loser = author_user, other_user
+        winner_res, loser_res = (
+            author_api_res or author_res,
+            other_api_res or other_res,
+        )
+    elif other_time:
+        winner, loser = other_user, author_user
+        winner_res, loser_res = (
+            other_api_res or other_res,
+            author_api_res or author_res,
+        )
 
     if winner is None or loser is None:
         embed.description += "\nNo winner could be determined! Either both failed to solve or finished at the same time. Challenge concluded!"
@@ -179,8 +194,7 @@ async def sleep_and_monitor(
         embed.timestamp = datetime.datetime.now()
         embed.set_footer(text="Challenge concluded.")
         await msg.edit(embed=embed)
-        dbfuncs.set_user_busy(author_user.name, busy=False)
-        dbfuncs.set_user_busy(other_user.name, busy=False)
+        await asyncdb.settle_challenge(author_user.id, other_user.id, outcome="draw")
         return
 
     await wrapup_challenge(
@@ -199,17 +213,11 @@ def get_submission_time_str(res):
 async def wrapup_challenge(
     msg, embed, winner, loser, question_data, winner_res, loser_res
 ):
-    dbfuncs.set_user_busy(winner.name, busy=False)
-    dbfuncs.set_user_busy(loser.name, busy=False)
+    w_stats, l_stats = await asyncdb.settle_challenge(winner.id, loser.id)
     embed.timestamp = datetime.datetime.now()
     embed.set_footer(text=f"Challenge concluded.")
     await msg.edit(embed=embed)
 
-    dbfuncs.add_win(winner.name)
-    dbfuncs.add_loss(loser.name)
-    w_stats = dbfuncs.get_user_challenge_stats(winner.name)
-    l_stats = dbfuncs.get_user_challenge_stats(loser.name)
-
     final_embed = discord.Embed(title="Challenge Over!", color=discord.Color.blue())
     final_embed.description = (
         f"Challenge between {winner.mention} and {loser.mention} has ended!\n"
@@ -280,8 +288,7 @@ async def start_challenge(msg, embed, author_user, other_user, question_data):
         time_limit = 60
     embed.description += f"\nAll players joined. Challenge started!\nYou have {time_limit} minutes to complete the problem!"
     await msg.edit(embed=embed)
-    dbfuncs.set_user_busy(author_user.name)
-    dbfuncs.set_user_busy(other_user.name)
+    await asyncdb.set_users_busy_by_id((author_user.id, other_user.id))
 
     await sleep_and_monitor(
         msg, embed, author_user, other_user, time_limit, question_data
@@ -291,14 +298,35 @@ async def start_challenge(msg, embed, author_user, other_user, question_data):
 class Challenge(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.poll_challenges.change_interval(
+            seconds=getattr(config, "CHALLENGE_TICK_SECONDS", 10)
+        )
+
+    async def cog_load(self):
+        self.poll_challenges.start()
+
+    async def cog_unload(self):
+        self.poll_challenges.cancel()
 
     @commands.Cog.listener()
     async def on_ready(self):
         print("Challenge cog loaded")
 
+    @tasks.loop(seconds=10)
+    async def poll_challenges(self):
+        try:
+            await monitor.tick()
+        except Exception:
+            print("[MONITOR] Failed to poll running challenges")
+            traceback.print_exc()
+
+    @poll_challenges.before_loop
+    async def before_poll_challenges(self):
+        await self.bot.wait_until_ready()
+
     async def users_valid(self, author_user, other_user):
-        author = dbfuncs.check_discord_user(author_user.name)
-        other = dbfuncs.check_discord_user(other_user.name)
+        author = await asyncdb.check_discord_id(author_user.id)
+        other = await asyncdb.check_discord_id(other_user.id)
         return {author_user: author, other_user: other}
 
     @app_commands.command(name="challenge", description="Challenge a user")
@@ -377,14 +405,19 @@ class Challenge(commands.Cog):
 
             difficulty = difficulty.value if difficulty is not None else None
             question_data = await get_question(
-                user1=interaction.user.name,
-                user2=discord_user.name,
+                user1=interaction.user.id,
+                user2=discord_user.id,
                 difficulty=difficulty,
             )
+            if question_data is None:
+                message_embed.description = "Couldn't find a free problem that neither of you has solved! Challenge cancelled! :crying_cat:"
+                message_embed.color = discord.Color.red()
+                await msg.edit(embed=message_embed)
+                return
             # print(question_data)
             # check if already engaged in 1v1
             available = await check_users_available(
-                interaction.user.name, discord_user.name
+                interaction.user.id, discord_user.id
             )
             if not available:
                 # message_embed.description = "At least one user is already in a challenge!\n They must either complete the challenge or quit it using /challengequit!\n Challenge cancelled! :crying_cat:"
@@ -404,10 +437,14 @@ class Challenge(commands.Cog):
             ):
                 return
 
+        except DatabaseUnavailable:
+            # bot.py's tree error handler tells the user
+            raise
         except Exception as e:
             traceback.print_exc()
-            dbfuncs.set_user_busy(author_user.name, busy=False)
-            dbfuncs.set_user_busy(other_user.name, busy=False)
+            await asyncdb.set_users_busy_by_id(
+                (author_user.id, other_user.id), busy=False
+            )
         # sleep_until_done()
 
 
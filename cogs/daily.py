@@ -1,51 +1,13 @@
 import traceback
 import discord
-import re
 from discord.ext import commands
 from discord import app_commands
-import requests
 import datetime
-from html.parser import HTMLParser
 from lib.dbfuncs import track_queries
+from lib.dbbreaker import DatabaseUnavailable
 from lib.maintenance import maintenance_check
-import lib.dbfuncs as dbfuncs
-import config
-
-
-class Parser(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.out = []
-
-    def handle_starttag(self, tag, attrs):
-        if tag == "code":
-            self.out.append("`")
-        elif tag == {"strong", "b"}:
-            self.out.append("**")
-        elif tag == "li":
-            self.out.append("• ")
-        elif tag in {"em", "i"}:
-            self.out.append("*")
-        elif tag == "br":
-            self.out.append("\n")
-
-    def handle_endtag(self, tag):
-        if tag == "code":
-            self.out.append("`")
-        elif tag == {"strong", "b"}:
-            self.out.append("**")
-        elif tag == "li":
-            self.out.append("\n")
-        elif tag in {"em", "i"}:
-            self.out.append("*")
-
-    def handle_data(self, data):
-        self.out.append(data.replace("`", "\\`"))
-
-    def get_text(self):
-        text = "".join(self.out)
-        self.reset()
-        return re.sub(r"\n{2,}", "\n", text).strip()
+import lib.asyncdb as asyncdb
+import lib.daily as daily_cache
 
 
 class Daily(commands.Cog):
@@ -65,60 +27,10 @@ class Daily(commands.Cog):
     async def daily(self, interaction: discord.Interaction):
         await interaction.response.defer()
         try:
-            date = datetime.datetime.now().strftime("%m/%d/%y")
-            embed = discord.Embed(
-                title=f"Daily Question {date}", timestamp=datetime.datetime.now()
-            )
-            url = f"{config.LC_SERVER_URL}/daily"
-            response = requests.get(url).json()
+            response, embed = await daily_cache.get()
+            embed = embed.copy()
+            embed.timestamp = datetime.datetime.now()
             q_link = response["questionLink"]
-            q_id = response["questionFrontendId"]
-            q_title = response["questionTitle"]
-            q_diff = response["difficulty"]
-            q_prem = response["isPaidOnly"]
-            q_desc = response["question"]
-            qparser = Parser()
-            qparser.feed(q_desc)
-            q_desc = qparser.get_text()
-            topics = [topic["name"] for topic in response["topicTags"]]
-            hints = response["hints"]
-            likes = response["likes"]
-            dislikes = response["dislikes"]
-
-            desc_string = f"**[{q_id}. {q_title}]({q_link})**\n"
-            match q_diff:
-                case "Hard":
-                    desc_string += ":red_square: Hard\n"
-                    embed.color = discord.Color.red()
-                case "Medium":
-                    desc_string += ":orange_square: Medium\n"
-                    embed.color = discord.Color.orange()
-                case "Easy":
-                    desc_string += ":green_square: Easy\n"
-                    embed.color = discord.Color.green()
-            if q_prem:
-                desc_string += "\n:lock: Premium required!"
-
-            desc_string += "\n**Description:**\n"
-            desc_string += q_desc
-            desc_string += "\n\nTopics:\n"
-            desc_string += ", ".join([f"||{topic}||" for topic in topics])
-
-            desc_string += "\n\nHints:\n"
-            for hint in hints:
-                hint_parser = Parser()
-                hint_parser.feed(hint)
-                clean_hint = hint_parser.get_text()
-                desc_string += f"- ||{clean_hint}||\n"
-
-            desc_string += f"\n\n:+1: {likes}  :-1: {dislikes}\n"
-
-            if len(desc_string) >= 4096:
-                print(
-                    f"[DAILY ERROR] embed description too long! {len(desc_string)} exceeds limit of 4096"
-                )
-
-            embed.description = desc_string
 
             class BookmarkButton(discord.ui.View):
                 def __init__(self, user_id, problem_url):
@@ -134,7 +46,7 @@ class Daily(commands.Cog):
                 async def add_bookmark_btn(
                     self, interaction: discord.Interaction, button: discord.ui.Button
                 ):
-                    success, msg = dbfuncs.add_bookmark(
+                    success, msg = await asyncdb.add_bookmark(
                         interaction.user.id, self.problem_url
                     )
                     if success:
@@ -151,6 +63,8 @@ class Daily(commands.Cog):
                 embed=embed, view=BookmarkButton(interaction.user.id, q_link)
             )
 
+        except DatabaseUnavailable:
+            raise
         except Exception as e:
             print(f"[DAILY ERROR] see below:")
             traceback.print_exc()
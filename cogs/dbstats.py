@@ -0,0 +1,105 @@
+import discord
+import datetime
+import io
+from discord.ext import commands
+from discord import app_commands
+import lib.dbfuncs as dbfuncs
+import lib.dbmetrics as dbmetrics
+from lib.dbfuncs import track_queries
+from lib.maintenance import maintenance_check
+from lib.admin import admin_check
+from lib.challengemonitor import monitor
+
+SLOWEST_SHOWN = 8
+
+
+def format_stats(stats):
+    lines = [
+        (
+            f"{key.ljust(22)}{value:.2f}"
+            if isinstance(value, float)
+            else f"{key.ljust(22)}{value}"
+        )
+        for key, value in stats.items()
+    ]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+class DBStats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        print("DB Stats cog loaded")
+
+    @app_commands.command(
+        name="zdbstats",
+        description="Show database pool and query latency stats (ADMIN ONLY)",
+    )
+    @track_queries
+    @admin_check()
+    @maintenance_check()
+    async def dbstats(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        embed = discord.Embed(title="Database Stats", timestamp=datetime.datetime.now())
+        stats = dbfuncs.get_pool_stats()
+        if stats is None:
+            embed.description = "Connection pool not initialized yet"
+        else:
+            embed.add_field(
+                name="Connection Pool", value=format_stats(stats), inline=False
+            )
+        embed.add_field(
+            name="Circuit Breaker",
+            value=format_stats(dbfuncs.get_breaker_stats()),
+            inline=False,
+        )
+        replica_stats = dbfuncs.get_replica_pool_stats()
+        if replica_stats is not None:
+            embed.add_field(
+                name="Replica Pool",
+                value=format_stats(replica_stats),
+                inline=False,
+            )
+
+        embed.add_field(
+            name="Challenge Monitor",
+            value=format_stats(monitor.stats()),
+            inline=False,
+        )
+
+        rows = dbmetrics.snapshot()
+        slowest = sorted(
+            (row for row in rows if row[1] == "execute"),
+            key=lambda row: row[5],
+            reverse=True,
+        )[:SLOWEST_SHOWN]
+        if slowest:
+            lines = [f"{'function'.ljust(24)}{'p95 ms':>8}{'calls':>7}"] + [
+                f"{name[:23].ljust(24)}{p95:>8.1f}{count:>7}"
+                for name, _, count, _, _, p95, _ in slowest
+            ]
+            embed.add_field(
+                name="Slowest Queries (p95)",
+                value="```\n" + "\n".join(lines) + "\n```",
+                inline=False,
+            )
+
+        # the full table is too wide for an embed, so it goes in an attachment
+        report = dbmetrics.format_table(rows)
+        slow = dbmetrics.slow_queries()
+        if slow:
+            report += "\n\nSlow queries\n" + "\n".join(
+                f"{datetime.datetime.fromtimestamp(at):%Y-%m-%d %H:%M:%S} "
+                f"{name} {seconds * 1000:.1f}ms {sql} {params}"
+                for at, name, seconds, sql, params in slow
+            )
+        file = discord.File(io.BytesIO(report.encode()), filename="dbmetrics.txt")
+
+        embed.set_footer(text=f"Requested by {interaction.user.name}")
+        await interaction.followup.send(embed=embed, file=file, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(DBStats(bot))
@@ -0,0 +1,159 @@
+import datetime
+import traceback
+from discord.ext import commands, tasks
+import lib.asyncdb as asyncdb
+import lib.catalog as catalog
+import lib.daily as daily_cache
+import config
+
+
+class Housekeeping(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.reconcile_registry.change_interval(
+            minutes=getattr(config, "REGISTRY_RECONCILE_MINUTES", 10)
+        )
+        self.flush_query_counts.change_interval(
+            seconds=getattr(config, "QUERY_FLUSH_SECONDS", 30)
+        )
+        self.refresh_difficulties.change_interval(
+            minutes=getattr(config, "DIFFICULTY_REFRESH_MINUTES", 60)
+        )
+        self.refresh_leaderboard.change_interval(
+            seconds=getattr(config, "LEADERBOARD_REFRESH_SECONDS", 60)
+        )
+        self.sync_solved.change_interval(
+            seconds=getattr(config, "SOLVED_SYNC_SECONDS", 60)
+        )
+        self.refresh_catalog.change_interval(
+            hours=getattr(config, "CATALOG_REFRESH_HOURS", 6)
+        )
+        delay = getattr(config, "DAILY_PREWARM_SECONDS", 30)
+        self.prewarm_daily.change_interval(
+            time=datetime.time(
+                minute=delay // 60, second=delay % 60, tzinfo=datetime.timezone.utc
+            )
+        )
+
+    async def cog_load(self):
+        self.reconcile_registry.start()
+        self.flush_query_counts.start()
+        self.refresh_difficulties.start()
+        self.refresh_leaderboard.start()
+        self.sync_solved.start()
+        self.refresh_catalog.start()
+        self.prewarm_daily.start()
+
+    async def cog_unload(self):
+        self.reconcile_registry.cancel()
+        self.flush_query_counts.cancel()
+        self.refresh_difficulties.cancel()
+        self.refresh_leaderboard.cancel()
+        self.sync_solved.cancel()
+        self.refresh_catalog.cancel()
+        self.prewarm_daily.cancel()
+        # write out whatever was counted since the last tick
+        await self.flush_query_counts()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        print("Housekeeping cog loaded")
+
+    @tasks.loop(minutes=10)
+    async def reconcile_registry(self):
+        try:
+            count = await asyncdb.load_registry()
+            print(f"[REGISTRY] Loaded {count} users")
+        except Exception:
+            print("[REGISTRY] Failed to reconcile user registry")
+            traceback.print_exc()
+
+    @reconcile_registry.before_loop
+    async def before_reconcile_registry(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(seconds=30)
+    async def flush_query_counts(self):
+        try:
+            await asyncdb.flush_query_counts()
+        except Exception:
+            print("[TRACKING] Failed to flush query counts, will retry")
+            traceback.print_exc()
+
+    @tasks.loop(minutes=60)
+    async def refresh_difficulties(self):
+        try:
+            count = await asyncdb.load_difficulties()
+            print(f"[DIFFICULTY] Loaded {count} problems")
+        except Exception:
+            print("[DIFFICULTY] Failed to refresh difficulty table")
+            traceback.print_exc()
+
+    @refresh_difficulties.before_loop
+    async def before_refresh_difficulties(self):
+        await self.bot.wait_until_ready()
+
+    # points are mostly awarded by the web server, so poll rather than only
+    # refreshing on the bot's own point changes
+    @tasks.loop(seconds=60)
+    async def refresh_leaderboard(self):
+        try:
+            await asyncdb.refresh_leaderboard()
+        except Exception:
+            print("[LEADERBOARD] Failed to refresh leaderboard view")
+            traceback.print_exc()
+
+    @refresh_leaderboard.before_loop
+    async def before_refresh_leaderboard(self):
+        await self.bot.wait_until_ready()
+
+    # submissions are written by the web server, so poll for new ones
+    @tasks.loop(seconds=60)
+    async def sync_solved(self):
+        try:
+            await asyncdb.sync_solved()
+        except Exception:
+            print("[SOLVED] Failed to sync solved problems")
+            traceback.print_exc()
+
+    @sync_solved.before_loop
+    async def before_sync_solved(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=6)
+    async def refresh_catalog(self):
+        try:
+            count = await catalog.refresh()
+            print(f"[CATALOG] Fetched {count} problems, {catalog.size()} known")
+        except Exception:
+            print("[CATALOG] Failed to refresh problem catalog")
+            traceback.print_exc()
+
+    @refresh_catalog.before_loop
+    async def before_refresh_catalog(self):
+        await self.bot.wait_until_ready()
+        try:
+            print(f"[CATALOG] Loaded {await catalog.load()} problems from disk")
+        except Exception:
+            print("[CATALOG] Failed to load problem catalog snapshot")
+            traceback.print_exc()
+
+    # fetch the new daily question just after 00:00 UTC, before the rush
+    @tasks.loop(time=datetime.time(second=30, tzinfo=datetime.timezone.utc))
+    async def prewarm_daily(self):
+        try:
+            payload, _ = await daily_cache.get()
+            print(f"[DAILY] Cached {payload['questionTitle']}")
+        except Exception:
+            print("[DAILY] Failed to prewarm the daily question")
+            traceback.print_exc()
+
+    @prewarm_daily.before_loop
+    async def before_prewarm_daily(self):
+        await self.bot.wait_until_ready()
+        # so the first /leetcode modal after a restart shows today's question
+        daily_cache.warm()
+
+
+async def setup(bot):
+    await bot.add_cog(Housekeeping(bot))
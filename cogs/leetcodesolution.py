@@ -1,7 +1,6 @@
 # leetcode_solution_refactored.py
 
 import json
-import aiohttp
 import traceback
 import discord
 from discord.ext import commands
@@ -11,18 +10,14 @@ from google import genai
 import re, io
 import urllib.parse
 import validators
-import requests
+from lib.dbbreaker import DatabaseUnavailable
 from lib.maintenance import maintenance_check
-import lib.dbfuncs as dbfuncs
+import lib.httpclient as httpclient
+import lib.daily as daily_cache
+import lib.asyncdb as asyncdb
 from lib.dbfuncs import track_queries
 
 
-async def fetch_json(session: aiohttp.ClientSession, url: str):
-    async with session.get(url, timeout=10) as r:
-        r.raise_for_status()
-        return await r.json()
-
-
 async def get_diff_color(url):
     color = discord.Color.purple()
     match = re.search(r"/problems/([^/]+)/?", url)
@@ -30,7 +25,9 @@ async def get_diff_color(url):
         return color
     title_slug = match.group(1)
 
-    res = requests.get(f"{config.LC_SERVER_URL}/select?titleSlug={title_slug}").json()
+    res = await httpclient.get_json(
+        f"{config.LC_SERVER_URL}/select", params={"titleSlug": title_slug}
+    )
     diff = res["difficulty"]
     match diff:
         case "Easy":
@@ -90,16 +87,10 @@ class LanguageSelectView(ui.View):
 
 
 class CodeModal(ui.Modal, title="Paste your solution"):
-    def get_daily_url():
-        try:
-            url = f"{config.LC_SERVER_URL}/daily"
-            response_json = requests.get(url).json()
-            return response_json["questionLink"]
-        except:
-            return "https://leetcode.com/problems/two-sum"
+    fallback_url = "https://leetcode.com/problems/two-sum"
 
     submission_url = ui.TextInput(
-        label="leetcode submission link", placeholder=get_daily_url()
+        label="leetcode submission link", placeholder=fallback_url
     )
     code = ui.TextInput(label="solution code", style=discord.TextStyle.paragraph)
 
@@ -107,6 +98,13 @@ class CodeModal(ui.Modal, title="Paste your solution"):
         super().__init__()
         self.parent_cog = parent_cog
         self.language = language
+        # the modal has to be sent right away, so only use the daily question
+        # if it is already cached; otherwise fetch it for the next modal
+        daily = daily_cache.peek()
+        if daily:
+            self.submission_url.placeholder = daily["questionLink"]
+        else:
+            daily_cache.warm()
 
     async def on_submit(self, interaction: discord.Interaction):
         if not self.parent_cog.is_valid_leetcode_submission_link(
@@ -207,7 +205,7 @@ class LeetcodeSolution(commands.Cog):
     ):
         try:
             chosen_mode = mode.value if mode else None
-            effective_user = dbfuncs.get_leetcode_from_discord(itx.user.name)
+            effective_user = await asyncdb.get_leetcode_from_discord_id(itx.user.id)
             attempt_auto = chosen_mode == "auto" or (
                 chosen_mode is None and effective_user
             )
@@ -223,29 +221,22 @@ class LeetcodeSolution(commands.Cog):
                 await itx.response.defer(thinking=True)
 
                 try:
-                    async with aiohttp.ClientSession() as sess:
-                        data = await fetch_json(
-                            sess,
-                            f"{config.LC_SERVER_URL}/{effective_user}/acSubmission",
-                        )
-                        if not data.get("submission"):
-                            raise RuntimeError("No recent accepted submissions found.")
-                        latest = max(
-                            data["submission"], key=lambda x: int(x["timestamp"])
-                        )
-                        code_json = await fetch_json(
-                            sess,
-                            f"{config.LC_SERVER_URL}/api/scrapeSubmission/{latest['id']}",
-                        )
-                        language = self.normalize_language(latest["lang"])
-                        code_text = code_json["code"]
-                        problem_url = (
-                            f"https://leetcode.com/problems/{latest['titleSlug']}/"
-                        )
-                        await self.handle_solution(
-                            itx, language, code_text, problem_url
-                        )
-                        return
+                    data = await httpclient.get_json(
+                        f"{config.LC_SERVER_URL}/{effective_user}/acSubmission"
+                    )
+                    if not data.get("submission"):
+                        raise RuntimeError("No recent accepted submissions found.")
+                    latest = max(data["submission"], key=lambda x: int(x["timestamp"]))
+                    code_json = await httpclient.get_json(
+                        f"{config.LC_SERVER_URL}/api/scrapeSubmission/{latest['id']}"
+                    )
+                    language = self.normalize_language(latest["lang"])
+                    code_text = code_json["code"]
+                    problem_url = (
+                        f"https://leetcode.com/problems/{latest['titleSlug']}/"
+                    )
+                    await self.handle_solution(itx, language, code_text, problem_url)
+                    return
                 except Exception as e:
                     traceback.print_exc()
                     await itx.followup.send(
@@ -265,6 +256,8 @@ class LeetcodeSolution(commands.Cog):
                     view=LanguageSelectView(self),
                     ephemeral=True,
                 )
+        except DatabaseUnavailable:
+            raise
         except:
             traceback.print_exc()
 
@@ -323,7 +316,7 @@ class LeetcodeSolution(commands.Cog):
                 label="Bookmark Problem", style=discord.ButtonStyle.primary, emoji="🔖"
             )
             async def add_bookmark_btn(self, interaction: discord.Interaction, _):
-                success, msg = dbfuncs.add_bookmark(
+                success, msg = await asyncdb.add_bookmark(
                     interaction.user.id, self.problem_url
                 )
                 if success:
@@ -2,12 +2,13 @@ import discord
 import config
 from discord.ext import commands
 from discord import app_commands
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 import lib.emojis as emojis
-import requests
+import lib.httpclient as httpclient
 import datetime
 import traceback
 from lib.dbfuncs import track_queries
+from lib.dbbreaker import DatabaseUnavailable
 from lib.maintenance import maintenance_check
 
 
@@ -48,10 +49,11 @@ class Lookup(commands.Cog):
         discord_name = None
         header_titles = ["discord-username", "leetcode-username"]
         for url, header_title in zip(urls, header_titles):
-            response = requests.get(url, headers={header_title: username})
             try:
-                if response.status_code == 200:
-                    data = response.json()
+                status, data = await httpclient.fetch_json(
+                    url, headers={header_title: username}
+                )
+                if status == 200:
                     cleaned_discord_username = (
                         str(data["discord_username"])
                         .replace("_", "\\_")
@@ -67,7 +69,7 @@ class Lookup(commands.Cog):
                     leetcode_url = f"https://leetcode.com/u/{data['leetcode_username']}"
                     description += f"{leetcode_emoji} **LeetCode Username**: [{cleaned_leetcode_username}]({leetcode_url})\n"
                     # get points using db function
-                    points = dbfuncs.get_user_points(data["discord_username"])
+                    points = await asyncdb.get_user_points(data["discord_username"])
                     description += (
                         f":chart_with_upwards_trend: **Points**: {points:.2f}\n"
                     )
@@ -81,14 +83,25 @@ class Lookup(commands.Cog):
 
                     # get leetcode ac
                     leetcode_ac_url = f"{config.SERVER_URL}/api/leetcode_ac"
-                    leetcode_ac_response = requests.get(
+                    leetcode_ac_status, json = await httpclient.fetch_json(
                         leetcode_ac_url,
                         headers={"leetcode-username": data["leetcode_username"]},
                     )
                     leetcode_ac = []
-                    if leetcode_ac_response.status_code == 200:
-                        json = leetcode_ac_response.json()
-                        for i in range(min(5, json["count"])):
+                    if leetcode_ac_status == 200:
+                        submission_count = min(5, json["count"])
+                        try:  # catch odd error
+                            difficulties = await asyncdb.get_points_many(
+                                [
+                                    json["submission"][i]["titleSlug"]
+                                    for i in range(submission_count)
+                                ]
+                            )
+                        except DatabaseUnavailable:
+                            raise
+                        except:
+                            difficulties = {}
+                        for i in range(submission_count):
                             timestamp = json["submission"][i]["timestamp"]
                             language = json["submission"][i]["lang"].lower()
                             if "c++" in language:
@@ -110,12 +123,9 @@ class Lookup(commands.Cog):
                             else:
                                 emoji = ""
                             # print(json['submission'][i]['titleSlug'])
-                            try:  # catch odd error
-                                difficulty = dbfuncs.get_points(
-                                    problem_slug=json["submission"][i]["titleSlug"]
-                                )
-                            except:
-                                difficulty = 0
+                            difficulty = difficulties.get(
+                                json["submission"][i]["titleSlug"], 0
+                            )
                             difficulty_emoji = ""
                             if difficulty == 1:
                                 difficulty_emoji = ":green_square:"
@@ -133,11 +143,13 @@ class Lookup(commands.Cog):
                     embed.set_image(url=data["avatar"])
 
                     break
+            except DatabaseUnavailable:
+                raise
             except Exception as e:
                 traceback.print_exc()
         # get user challenge stats
         if ":catsad:" not in description:
-            challenge_stats = dbfuncs.get_user_challenge_stats(discord_name)
+            challenge_stats = await asyncdb.get_user_challenge_stats(discord_name)
             wins, losses, quits = challenge_stats
             description += f":crossed_swords: Challenge Stats:\n{wins} {'win' if wins == 1 else 'wins'}, {losses} {'loss' if losses == 1 else 'losses'}, {quits} {'quit' if quits == 1 else 'quits'}"
 
@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 import datetime
 import traceback
 import time
@@ -27,7 +27,7 @@ class NextReset(commands.Cog):
         
         embed = discord.Embed(title=f"Next Reset", timestamp=datetime.datetime.now())
         embed.set_footer(text=f"Requested by {interaction.user.name}")
-        reset_info = dbfuncs.get_last_reset()
+        reset_info = await asyncdb.get_last_reset()
         description = ''
         if reset_info:
             reset_info = reset_info[0]
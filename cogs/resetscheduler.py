@@ -0,0 +1,50 @@
+import datetime
+import traceback
+from discord.ext import commands, tasks
+import lib.asyncdb as asyncdb
+import config
+
+
+class ResetScheduler(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.check_reset.change_interval(
+            minutes=getattr(config, "RESET_CHECK_MINUTES", 1)
+        )
+
+    async def cog_load(self):
+        self.check_reset.start()
+
+    async def cog_unload(self):
+        self.check_reset.cancel()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        print("Reset Scheduler cog loaded")
+
+    @tasks.loop(minutes=1)
+    async def check_reset(self):
+        try:
+            reset_info = await asyncdb.get_last_reset()
+            if not reset_info:
+                return
+            last_reset, reset_interval = reset_info[0]
+            next_reset = last_reset + datetime.timedelta(days=reset_interval)
+            if datetime.datetime.now() < next_reset:
+                return
+            # run_reset re-checks under a row lock, so a stale read is harmless
+            result = await asyncdb.run_reset()
+            if result:
+                period_end, winner = result
+                print(f"[RESET] Closed period ending {period_end}, winner {winner}")
+        except Exception:
+            print("[RESET] Failed to run scheduled leaderboard reset")
+            traceback.print_exc()
+
+    @check_reset.before_loop
+    async def before_check_reset(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot):
+    await bot.add_cog(ResetScheduler(bot))
@@ -2,10 +2,11 @@ import discord
 import config
 from discord.ext import commands
 from discord import app_commands
-import requests
-import lib.dbfuncs as dbfuncs
+import lib.httpclient as httpclient
+import lib.asyncdb as asyncdb
 
 # from lib.dbfuncs import track_queries
+from lib.dbbreaker import DatabaseUnavailable
 from lib.maintenance import maintenance_check
 
 
@@ -28,17 +29,19 @@ class SelfRegister(commands.Cog):
         await interaction.response.defer()
         try:
 
-            if dbfuncs.check_discord_user(interaction.user.name):
+            if await asyncdb.check_discord_id(interaction.user.id):
                 out = f"Discord user {interaction.user.mention} already registered"
-                lc_user = dbfuncs.get_leetcode_from_discord(interaction.user.name)
+                lc_user = await asyncdb.get_leetcode_from_discord_id(
+                    interaction.user.id
+                )
                 if lc_user:
                     out += f" as {lc_user}"
                 await interaction.followup.send(out)
                 return
 
-            if dbfuncs.check_leetcode_user(leetcode_user):
+            if await asyncdb.check_leetcode_user(leetcode_user):
                 out = f"User {leetcode_user} already registered"
-                dc_user = dbfuncs.get_discord_from_leetcode(leetcode_user)
+                dc_user = await asyncdb.get_discord_from_leetcode(leetcode_user)
                 if dc_user:
                     out += f" with Discord: {dc_user}"
                 await interaction.followup.send(out)
@@ -47,17 +50,21 @@ class SelfRegister(commands.Cog):
             # check if user actually entered their leetcode username
             url = f"{config.LC_SERVER_URL}/api/leetcode_ac"
             headers = {"leetcode-username": leetcode_user}
-            response = requests.get(url, headers=headers)
-            if response.status_code != 200 or response.json().get("count") == 0:
+            status, data = await httpclient.fetch_json(url, headers=headers)
+            if status != 200 or data.get("count") == 0:
                 await interaction.followup.send(
                     f"Invalid LeetCode username: {leetcode_user}! Register with your **LeetCode** username."
                 )
                 return
 
-            dbfuncs.add_user(interaction.user.name, interaction.user.id, leetcode_user)
+            await asyncdb.add_user(
+                interaction.user.name, interaction.user.id, leetcode_user
+            )
             await interaction.followup.send(
                 f"Registered {interaction.user.name} as {leetcode_user}"
             )
+        except DatabaseUnavailable:
+            raise
         except Exception as e:
             print(e)
 
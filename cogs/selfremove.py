@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 from lib.dbfuncs import track_queries
 from lib.maintenance import maintenance_check
 
@@ -27,12 +27,12 @@ class SelfRemove(commands.Cog):
             await interaction.followup.send("Removal cancelled.")
             return
         discord_user = interaction.user.name
-        if not dbfuncs.check_discord_user(discord_user):
+        if not await asyncdb.check_discord_id(interaction.user.id):
             out = f"Discord user {discord_user} not registered"
             await interaction.followup.send(out)
             return
 
-        dbfuncs.remove_user(interaction.user.id)
+        await asyncdb.remove_user(interaction.user.id)
         await interaction.followup.send(
             f"Removed {discord_user} from leaderboard and database."
         )
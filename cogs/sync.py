@@ -1,7 +1,7 @@
 # sync all commands2
 import discord
 from discord.ext import commands
-import lib.dbfuncs as dbfuncs
+from lib.admin import is_admin
 from lib.dbfuncs import track_queries
 from lib.maintenance import maintenance_check
 
@@ -20,9 +20,7 @@ class Sync(commands.Cog):
     @maintenance_check()
     async def sync(self, ctx) -> None:
         # print(ctx.message.author.id)
-        admins = dbfuncs.get_admins()
-        admins = set([admin[0] for admin in admins])
-        if ctx.message.author.id in admins:
+        if await is_admin(ctx.message.author.id):
             # print("Admin detected")
             # update status
             activity = discord.Activity(
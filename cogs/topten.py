@@ -1,10 +1,10 @@
 import discord
-import config
 from discord.ext import commands
 from discord import app_commands
-import requests
 import datetime
+import lib.asyncdb as asyncdb
 from lib.dbfuncs import track_queries
+from lib.dbbreaker import DatabaseUnavailable
 from lib.maintenance import maintenance_check
 import traceback
 
@@ -28,9 +28,7 @@ class TopTen(commands.Cog):
         await interaction.response.defer()
         # update_query_count(interaction.user.id, interaction.user.name)
         try:
-            url = f"{config.SERVER_URL}/leaderboard"
-            response = requests.get(url)
-            data = response.json()
+            data = await asyncdb.get_leaderboard(10)
             embed = self.create_detailed_embed(data, interaction.user.name)
 
             view = discord.ui.View(timeout=None)
@@ -52,6 +50,8 @@ class TopTen(commands.Cog):
 
             toggle_button.callback = button_callback
 
+        except DatabaseUnavailable:
+            raise
         except Exception as e:
             traceback.print_exc()
             print(e)
@@ -61,7 +61,7 @@ class TopTen(commands.Cog):
             description = "View full leaderboard at [codeforall.nyc](https://www.codeforall.nyc/leaderboard)\n"
             leetcode_emoji = self.bot.get_emoji(1290903612351844464)
             discord_emoji = self.bot.get_emoji(1290903900169310248)
-            for i in range(10):
+            for i in range(len(data)):
                 cleaned_discord_username = (
                     str(data[i]["discord_username"])
                     .replace("_", "\\_")
@@ -91,7 +91,7 @@ class TopTen(commands.Cog):
         discord_users = []
         leetcode_users = []
         points = []
-        for i in range(10):
+        for i in range(len(data)):
             cleaned_discord_username = (
                 str(data[i]["discord_username"]).replace("_", "\\_").replace("*", "\\*")
             )
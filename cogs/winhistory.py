@@ -1,12 +1,13 @@
+import typing
 import discord
 import config
 from discord.ext import commands
 from discord import app_commands
-import requests
 import datetime
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
 import traceback
 from lib.dbfuncs import track_queries
+from lib.dbbreaker import DatabaseUnavailable
 from lib.maintenance import maintenance_check
 
 
@@ -23,12 +24,19 @@ class WinHistory(commands.Cog):
         name="winhistory",
         description="View the latest 10 winners.",
     )
+    @app_commands.describe(discord_user="only show wins by this user")
     @track_queries
     @maintenance_check()
-    async def winhistory(self, interaction: discord.Interaction):
+    async def winhistory(
+        self,
+        interaction: discord.Interaction,
+        discord_user: typing.Optional[discord.Member],
+    ):
         await interaction.response.defer()
         try:
-            data = dbfuncs.get_win_history()
+            data = await asyncdb.get_win_history(
+                discord_id=discord_user.id if discord_user else None
+            )
             # url = '{config.LC_SERVER_URL}/leaderboard'
             # response = requests.get(url)
             # data = response.json()
@@ -61,6 +69,8 @@ class WinHistory(commands.Cog):
 
                 toggle_button.callback = button_callback
 
+        except DatabaseUnavailable:
+            raise
         except Exception as e:
             traceback.print_exc()
             print(e)
@@ -0,0 +1,39 @@
+from discord import app_commands
+from discord import Interaction
+from discord.app_commands import CheckFailure
+import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
+from lib.dbbreaker import DatabaseUnavailable
+from lib.maintenance import send_degraded
+
+
+class AdminCheckFailure(CheckFailure):
+    pass
+
+
+async def is_admin(discord_id: int) -> bool:
+    admins = dbfuncs.cached_admin_ids()
+    if admins is None:
+        admins = await asyncdb.get_admin_ids()
+    return discord_id in admins
+
+
+def admin_check():
+    """Only let admins run the command. Checks run bottom-up, so place this
+    above @maintenance_check() to have the breaker fail fast first."""
+
+    async def predicate(interaction: Interaction) -> bool:
+        try:
+            admin = await is_admin(interaction.user.id)
+        except DatabaseUnavailable:
+            # errors raised by a check never reach the tree error handler
+            await send_degraded(interaction)
+            raise AdminCheckFailure()
+        if not admin:
+            await interaction.response.send_message(
+                "You are not an admin", ephemeral=True
+            )
+            raise AdminCheckFailure()
+        return True
+
+    return app_commands.check(predicate)
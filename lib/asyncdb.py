@@ -0,0 +1,78 @@
+"""Awaitable versions of the lib.dbfuncs API.
+
+Every dbfuncs function that talks to the database is available here under the
+same name and with the same return value, e.g.
+
+    await asyncdb.get_leetcode_from_discord(name)
+
+Calls run on a dedicated thread pool sized to the connection pool, so a slow
+query only ties up a worker thread instead of the event loop. Functions that
+also call an upstream API (add_bookmark) are defined here, so the HTTP part
+stays on the event loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+import re
+from concurrent.futures import ThreadPoolExecutor
+import lib.dbfuncs as dbfuncs
+import lib.httpclient as httpclient
+import config
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(
+        config, "DB_EXECUTOR_WORKERS", getattr(config, "DB_POOL_MAX", 10)
+    ),
+    thread_name_prefix="dbfuncs",
+)
+
+
+async def run(func, *args, **kwargs):
+    """Run a blocking database callable on the executor and await its result."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+async def add_bookmark(discord_id, problem_url):
+    """Check that `problem_url` names a real problem, then bookmark it. The
+    check is an HTTP call, so it runs here on the event loop and only the
+    insert goes to the executor."""
+    match = re.search(r"/problems/([^/]+)/?", problem_url)
+    if not match:
+        return False, "❌ Could not extract a valid problem slug from the URL"
+
+    slug = match.group(1)
+    try:
+        status, json_data = await httpclient.fetch_json(
+            f"{config.LC_SERVER_URL}/select", params={"titleSlug": slug}
+        )
+    except Exception as e:
+        return False, str(e)
+
+    if status != 200:
+        return False, f"Failed to validate slug (HTTP {status})"
+    if not json_data:
+        return False, f"❌ `{slug}` is not a valid LeetCode problem"
+
+    return await run(dbfuncs.add_bookmark, discord_id, slug)
+
+
+def shutdown():
+    _executor.shutdown(wait=True)
+
+
+def __getattr__(name):
+    func = getattr(dbfuncs, name, None)
+    if not getattr(func, "uses_db", False):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+
+    globals()[name] = wrapper
+    return wrapper
@@ -0,0 +1,170 @@
+"""Local copy of the LeetCode problem list, used to pick challenge questions.
+
+The catalog is a snapshot of `LC_SERVER_URL/problems` kept in memory and in
+CATALOG_PATH (data/problems.json), so a restart does not have to download it
+again. refresh() only fetches problems added since the last snapshot, except
+that the whole list is fetched again every CATALOG_FULL_REFRESH_DAYS so
+paid-only flags and acceptance rates stay current.
+
+Each problem is stored as
+
+    {"titleSlug", "title", "questionFrontendId", "difficulty", "isPaidOnly",
+     "acRate", "tags"}
+
+with `difficulty` one of "Easy", "Medium", "Hard" as the upstream reports it.
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import random
+import lib.httpclient as httpclient
+import config
+
+DIFFICULTIES = ("EASY", "MEDIUM", "HARD")
+
+_problems = {}  # titleSlug -> problem
+_free = {}  # "EASY"/"MEDIUM"/"HARD"/None -> slugs of free problems
+_full_refresh_at = None
+_refresh_lock = asyncio.Lock()
+
+
+def _path():
+    return getattr(config, "CATALOG_PATH", "data/problems.json")
+
+
+def _normalize(question):
+    return {
+        "titleSlug": question["titleSlug"],
+        "title": question["title"],
+        "questionFrontendId": str(question["questionFrontendId"]),
+        "difficulty": question["difficulty"],
+        "isPaidOnly": bool(question["isPaidOnly"]),
+        "acRate": float(question.get("acRate") or 0),
+        "tags": [
+            tag["name"] if isinstance(tag, dict) else tag
+            for tag in question.get("topicTags") or question.get("tags") or []
+        ],
+    }
+
+
+def _index(problems, full_refresh_at):
+    # only called on the event loop thread, so pick() never sees a mix of
+    # old and new tables
+    global _problems, _free, _full_refresh_at
+    free = {difficulty: [] for difficulty in (*DIFFICULTIES, None)}
+    for slug, problem in problems.items():
+        if problem["isPaidOnly"]:
+            continue
+        free[None].append(slug)
+        free.setdefault(problem["difficulty"].upper(), []).append(slug)
+    _problems, _free, _full_refresh_at = problems, free, full_refresh_at
+
+
+def size():
+    return len(_problems)
+
+
+def get(slug):
+    return _problems.get(slug)
+
+
+def _read():
+    try:
+        with open(_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+async def load():
+    """Load the snapshot from CATALOG_PATH and return the number of problems
+    (0 if there is none yet)."""
+    data = await asyncio.to_thread(_read)
+    if data is None:
+        return 0
+    full_refresh_at = data.get("full_refresh_at")
+    _index(
+        {problem["titleSlug"]: problem for problem in data["problems"]},
+        datetime.datetime.fromisoformat(full_refresh_at) if full_refresh_at else None,
+    )
+    return len(_problems)
+
+
+def save():
+    path = _path()
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        "full_refresh_at": _full_refresh_at.isoformat() if _full_refresh_at else None,
+        "problems": sorted(
+            _problems.values(), key=lambda problem: int(problem["questionFrontendId"])
+        ),
+    }
+    # write then rename so a crash never leaves a truncated snapshot behind
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def _needs_full_refresh(now):
+    if not _problems or _full_refresh_at is None:
+        return True
+    max_age = datetime.timedelta(days=getattr(config, "CATALOG_FULL_REFRESH_DAYS", 7))
+    return now - _full_refresh_at >= max_age
+
+
+async def refresh(full=None):
+    """Fetch new problems from LC_SERVER_URL/problems, or all of them when
+    `full` is set (by default when the last full fetch is too old). Saves the
+    snapshot and returns the number of problems fetched."""
+    async with _refresh_lock:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if full is None:
+            full = _needs_full_refresh(now)
+        page_size = getattr(config, "CATALOG_PAGE_SIZE", 500)
+        # the list is ordered by frontend id, so new problems come after the
+        # ones already known
+        skip = 0 if full else len(_problems)
+        fetched = []
+        while True:
+            data = await httpclient.get_json(
+                f"{config.LC_SERVER_URL}/problems",
+                params={"limit": page_size, "skip": skip},
+            )
+            batch = data.get("problemsetQuestionList") or []
+            fetched.extend(_normalize(question) for question in batch)
+            skip += len(batch)
+            total = data.get("totalQuestions")
+            if len(batch) < page_size or (total is not None and skip >= total):
+                break
+
+        problems = {} if full else dict(_problems)
+        problems.update((problem["titleSlug"], problem) for problem in fetched)
+        _index(problems, now if full else _full_refresh_at)
+        if fetched or full:
+            await asyncio.to_thread(save)
+        return len(fetched)
+
+
+def pick(difficulty=None, exclude_titles=()):
+    """A random free problem of `difficulty` ("EASY", "MEDIUM", "HARD" or None
+    for any) whose title is not in `exclude_titles` (a set of titles or a
+    lib.solved.SolvedSet), or None if there is none.
+
+    Draws at random until a problem is not excluded, which takes O(1) draws
+    unless almost everything is excluded; after CATALOG_SAMPLE_ATTEMPTS
+    misses it filters the candidates instead."""
+    candidates = _free.get(difficulty) or []
+    problems = _problems
+    for _ in range(
+        min(len(candidates), getattr(config, "CATALOG_SAMPLE_ATTEMPTS", 20))
+    ):
+        problem = problems[random.choice(candidates)]
+        if problem["title"] not in exclude_titles:
+            return problem
+    remaining = [
+        slug for slug in candidates if problems[slug]["title"] not in exclude_titles
+    ]
+    return problems[random.choice(remaining)] if remaining else None
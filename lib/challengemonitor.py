@@ -0,0 +1,253 @@
+"""One poller for every running /challenge.
+
+A challenge registers its two players and problem with `monitor.watch()` and
+awaits the returned ActiveChallenge. The Challenge cog runs `monitor.tick()`
+every CHALLENGE_TICK_SECONDS; a tick only polls the players of challenges that
+are due. It fetches the accepted submissions of every distinct player once, at
+most CHALLENGE_POLL_CONCURRENCY at a time, reads the matching user_submissions
+rows in one query, and hands the results to every running challenge involving
+that player, due or not (their other players are polled in the same tick). A
+challenge finishes on the first poll that shows a solve, or on the first poll
+after its time limit.
+
+How often a challenge is due depends on how long it has been running
+compared to how long problems of its difficulty usually take to solve: every
+CHALLENGE_POLL_MAX_SECONDS before the quickest solves (p10), speeding up to
+every CHALLENGE_POLL_MIN_SECONDS by the median. Solve times start from
+SOLVE_TIME_PRIORS and are replaced by the ones observed here once there are
+CHALLENGE_HISTORY_MIN of them; a challenge nobody solved counts as taking its
+whole time limit. Players can also ask for an immediate check
+with `request_check()`, at most once every CHALLENGE_DONE_COOLDOWN_SECONDS.
+"""
+
+import asyncio
+import time
+import traceback
+import lib.asyncdb as asyncdb
+import lib.httpclient as httpclient
+from lib.dbmetrics import Histogram
+import config
+
+# (p10, p50) seconds from start to solve, until enough challenges finished
+SOLVE_TIME_PRIORS = {
+    "Easy": (180, 480),
+    "Medium": (480, 1080),
+    "Hard": (900, 2100),
+}
+
+
+class ActiveChallenge:
+    def __init__(self, players, title, difficulty, started, deadline):
+        self.players = players
+        self.title = title
+        self.difficulty = difficulty
+        self.started = started
+        self.deadline = deadline
+        self.next_poll = started
+        self.last_requested = {}  # discord id -> time of their last check
+        # resolves to {discord_id: (api submission or None, db rows)}
+        self.result = asyncio.get_running_loop().create_future()
+
+
+def is_solved(results):
+    """Whether a challenge's results show an accepted submission."""
+    return any(api_res or db_res for api_res, db_res in results.values())
+
+
+def _find_submission(submissions, title):
+    for submission in reversed(submissions):
+        if submission["title"] == title:
+            return submission
+    return None
+
+
+class ChallengeMonitor:
+    def __init__(self):
+        self._active = set()
+        self._lock = asyncio.Lock()
+        self._tick_seconds = Histogram(getattr(config, "DB_METRICS_WINDOW", 1000))
+        self._solve_seconds = {}  # difficulty -> Histogram
+        self._last = {"users_polled": 0, "queue_depth": 0, "tick_ms": 0.0}
+        self._max_queue_depth = 0
+        self._polls = 0
+        self._requested_checks = 0
+        self._poll_errors = 0
+
+    def solve_times(self, difficulty):
+        """(p10, p50) seconds to solve a problem of `difficulty`."""
+        history = self._solve_seconds.get(difficulty)
+        if history and history.count >= getattr(config, "CHALLENGE_HISTORY_MIN", 10):
+            return history.percentiles(10, 50)
+        return SOLVE_TIME_PRIORS.get(difficulty, SOLVE_TIME_PRIORS["Medium"])
+
+    def _next_poll(self, challenge, now):
+        fastest = getattr(config, "CHALLENGE_POLL_MIN_SECONDS", 15)
+        slowest = getattr(config, "CHALLENGE_POLL_MAX_SECONDS", 120)
+        early, typical = self.solve_times(challenge.difficulty)
+        elapsed = now - challenge.started
+        if elapsed <= early:
+            interval = slowest
+        elif elapsed >= typical:
+            interval = fastest
+        else:
+            progress = (elapsed - early) / (typical - early)
+            interval = slowest - (slowest - fastest) * progress
+        # always look once more right at the time limit
+        return min(now + interval, challenge.deadline)
+
+    def watch(self, players, question_data, time_limit):
+        """Start monitoring `players` (discord ids) for `question_data` for
+        `time_limit` minutes."""
+        now = time.time()
+        challenge = ActiveChallenge(
+            tuple(players),
+            question_data["title"],
+            question_data["difficulty"],
+            now,
+            now + time_limit * 60,
+        )
+        challenge.next_poll = self._next_poll(challenge, now)
+        self._active.add(challenge)
+        return challenge
+
+    async def wait(self, challenge):
+        try:
+            return await challenge.result
+        finally:
+            self._active.discard(challenge)
+
+    def request_check(self, challenge, discord_id):
+        """Make `challenge` due right away on behalf of `discord_id`. Returns
+        0 if the check was scheduled, otherwise the seconds until they may ask
+        again."""
+        now = time.time()
+        cooldown = getattr(config, "CHALLENGE_DONE_COOLDOWN_SECONDS", 30)
+        last = challenge.last_requested.get(discord_id)
+        if last is not None and now - last < cooldown:
+            return cooldown - (now - last)
+        challenge.last_requested[discord_id] = now
+        challenge.next_poll = now
+        self._requested_checks += 1
+        return 0
+
+    async def _poll_user(self, discord_id, semaphore):
+        """The user's recent accepted submissions, or None if they could not
+        be fetched this tick."""
+        try:
+            async with semaphore:
+                leetcode_user = await asyncdb.get_leetcode_from_discord_id(discord_id)
+                if not leetcode_user:
+                    return None
+                response = await httpclient.get_json(
+                    f"{config.LC_SERVER_URL}/{leetcode_user}/acSubmission"
+                )
+                return response["submission"]
+        except Exception:
+            self._poll_errors += 1
+            print(f"[MONITOR] Failed to fetch submissions for {discord_id}")
+            traceback.print_exc()
+            return None
+
+    def _record_outcome(self, challenge, results):
+        """Add how long a finished challenge took to its difficulty's solve
+        times. Only solve times the API reported are used; when nobody solved
+        it, the time limit stands in as a lower bound."""
+        # accepted submissions from before the start are old solves, not a
+        # measure of how long this problem takes
+        solved_at = [
+            int(api_res["timestamp"])
+            for api_res, _ in results.values()
+            if api_res
+            and "timestamp" in api_res
+            and int(api_res["timestamp"]) >= challenge.started
+        ]
+        if solved_at:
+            seconds = min(solved_at) - challenge.started
+        elif is_solved(results):
+            # only the database or an old submission shows the solve; when
+            # we noticed it says nothing about when it happened
+            return
+        else:
+            seconds = challenge.deadline - challenge.started
+        history = self._solve_seconds.get(challenge.difficulty)
+        if history is None:
+            history = self._solve_seconds[challenge.difficulty] = Histogram(
+                getattr(config, "DB_METRICS_WINDOW", 1000)
+            )
+        history.observe(seconds)
+
+    async def tick(self):
+        # a requested check can run while the scheduled tick is polling
+        async with self._lock:
+            now = time.time()
+            running = [c for c in self._active if not c.result.done()]
+            due_players = {
+                player for c in running if c.next_poll <= now for player in c.players
+            }
+            if not due_players:
+                return
+            started = time.perf_counter()
+            # a polled player's submissions count for every challenge they are
+            # in; poll the other players of those too so each is judged whole
+            challenges = [c for c in running if due_players.intersection(c.players)]
+            users = sorted({player for c in challenges for player in c.players})
+            concurrency = getattr(config, "CHALLENGE_POLL_CONCURRENCY", 8)
+            semaphore = asyncio.Semaphore(concurrency)
+            # polls that have to wait for a free slot when the tick starts
+            self._last["queue_depth"] = max(0, len(users) - concurrency)
+            submissions = dict(
+                zip(
+                    users,
+                    await asyncio.gather(
+                        *(self._poll_user(user, semaphore) for user in users)
+                    ),
+                )
+            )
+            rows = await asyncdb.get_challenge_submissions(
+                {(player, c.title) for c in challenges for player in c.players}
+            )
+
+            now = time.time()
+            for challenge in challenges:
+                if challenge.result.done():
+                    continue
+                results = {
+                    player: (
+                        _find_submission(submissions[player] or [], challenge.title),
+                        rows[(player, challenge.title)],
+                    )
+                    for player in challenge.players
+                }
+                if is_solved(results) or now >= challenge.deadline:
+                    self._record_outcome(challenge, results)
+                    challenge.result.set_result(results)
+                else:
+                    challenge.next_poll = self._next_poll(challenge, now)
+
+            elapsed = time.perf_counter() - started
+            self._tick_seconds.observe(elapsed)
+            self._polls += len(users)
+            self._max_queue_depth = max(
+                self._max_queue_depth, self._last["queue_depth"]
+            )
+            self._last["users_polled"] = len(users)
+            self._last["tick_ms"] = elapsed * 1000
+
+    def stats(self):
+        p50, p95 = self._tick_seconds.percentiles(50, 95)
+        return {
+            "active": sum(1 for c in self._active if not c.result.done()),
+            "ticks": self._tick_seconds.count,
+            "users_polled": self._last["users_polled"],
+            "total_polls": self._polls,
+            "requested_checks": self._requested_checks,
+            "last_tick_ms": self._last["tick_ms"],
+            "tick_p50_ms": p50 * 1000,
+            "tick_p95_ms": p95 * 1000,
+            "queue_depth": self._last["queue_depth"],
+            "max_queue_depth": self._max_queue_depth,
+            "poll_errors": self._poll_errors,
+        }
+
+
+monitor = ChallengeMonitor()
@@ -0,0 +1,179 @@
+"""The LeetCode daily question, cached until the next 00:00 UTC rollover.
+
+    payload, embed = await daily.get()
+
+returns the raw `LC_SERVER_URL/daily` payload and the rendered /daily embed.
+Both are built once per LeetCode day; concurrent calls on a cold cache share
+a single upstream fetch. The embed is shared, so callers that change it must
+work on `embed.copy()`.
+"""
+
+import asyncio
+import datetime
+import re
+from html.parser import HTMLParser
+import discord
+import lib.httpclient as httpclient
+import config
+
+
+class Parser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.out = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "code":
+            self.out.append("`")
+        elif tag == {"strong", "b"}:
+            self.out.append("**")
+        elif tag == "li":
+            self.out.append("• ")
+        elif tag in {"em", "i"}:
+            self.out.append("*")
+        elif tag == "br":
+            self.out.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "code":
+            self.out.append("`")
+        elif tag == {"strong", "b"}:
+            self.out.append("**")
+        elif tag == "li":
+            self.out.append("\n")
+        elif tag in {"em", "i"}:
+            self.out.append("*")
+
+    def handle_data(self, data):
+        self.out.append(data.replace("`", "\\`"))
+
+    def get_text(self):
+        text = "".join(self.out)
+        self.reset()
+        return re.sub(r"\n{2,}", "\n", text).strip()
+
+
+def render(payload, day):
+    """Build the /daily embed for `payload`, the question of UTC date `day`."""
+    embed = discord.Embed(title=f"Daily Question {day.strftime('%m/%d/%y')}")
+    q_link = payload["questionLink"]
+    q_id = payload["questionFrontendId"]
+    q_title = payload["questionTitle"]
+    q_diff = payload["difficulty"]
+    q_prem = payload["isPaidOnly"]
+    q_desc = payload["question"]
+    qparser = Parser()
+    qparser.feed(q_desc)
+    q_desc = qparser.get_text()
+    topics = [topic["name"] for topic in payload["topicTags"]]
+    hints = payload["hints"]
+    likes = payload["likes"]
+    dislikes = payload["dislikes"]
+
+    desc_string = f"**[{q_id}. {q_title}]({q_link})**\n"
+    match q_diff:
+        case "Hard":
+            desc_string += ":red_square: Hard\n"
+            embed.color = discord.Color.red()
+        case "Medium":
+            desc_string += ":orange_square: Medium\n"
+            embed.color = discord.Color.orange()
+        case "Easy":
+            desc_string += ":green_square: Easy\n"
+            embed.color = discord.Color.green()
+    if q_prem:
+        desc_string += "\n:lock: Premium required!"
+
+    desc_string += "\n**Description:**\n"
+    desc_string += q_desc
+    desc_string += "\n\nTopics:\n"
+    desc_string += ", ".join([f"||{topic}||" for topic in topics])
+
+    desc_string += "\n\nHints:\n"
+    for hint in hints:
+        hint_parser = Parser()
+        hint_parser.feed(hint)
+        clean_hint = hint_parser.get_text()
+        desc_string += f"- ||{clean_hint}||\n"
+
+    desc_string += f"\n\n:+1: {likes}  :-1: {dislikes}\n"
+
+    if len(desc_string) >= 4096:
+        print(
+            f"[DAILY ERROR] embed description too long! {len(desc_string)} exceeds limit of 4096"
+        )
+
+    embed.description = desc_string
+    return embed
+
+
+def next_rollover(now):
+    """The first 00:00 UTC strictly after `now` (an aware datetime)."""
+    tomorrow = now.astimezone(datetime.timezone.utc).date() + datetime.timedelta(days=1)
+    return datetime.datetime.combine(
+        tomorrow, datetime.time(), tzinfo=datetime.timezone.utc
+    )
+
+
+_cached = None  # (expires_at, payload, embed)
+_inflight = None  # task fetching the current day's question
+
+
+def peek():
+    """The cached payload if it is still current, without fetching."""
+    cached = _cached
+    if cached and discord.utils.utcnow() < cached[0]:
+        return cached[1]
+    return None
+
+
+async def _fetch():
+    global _cached, _inflight
+    try:
+        payload = await httpclient.get_json(f"{config.LC_SERVER_URL}/daily")
+        now = discord.utils.utcnow()
+        today = now.date()
+        expires_at = next_rollover(now)
+        # right after the rollover the upstream can still serve yesterday's
+        # question; keep it only briefly so the next call asks again
+        if payload.get("date") and payload["date"] != today.isoformat():
+            print(f"[DAILY] Upstream still serves {payload['date']}, retrying soon")
+            expires_at = min(
+                expires_at,
+                now
+                + datetime.timedelta(
+                    seconds=getattr(config, "DAILY_STALE_RETRY_SECONDS", 60)
+                ),
+            )
+        embed = render(payload, today)
+        _cached = (expires_at, payload, embed)
+        return payload, embed
+    finally:
+        _inflight = None
+
+
+def _report(task):
+    if not task.cancelled() and task.exception():
+        print(f"[DAILY] Failed to fetch the daily question: {task.exception()}")
+
+
+def warm():
+    """Start fetching in the background if nothing current is cached, for
+    callers that cannot wait but want a later peek() to hit."""
+    global _inflight
+    if peek() is None and _inflight is None:
+        _inflight = asyncio.ensure_future(_fetch())
+        _inflight.add_done_callback(_report)
+
+
+async def get():
+    """(payload, embed) for the current LeetCode day, fetched at most once
+    per day."""
+    global _inflight
+    cached = _cached
+    if cached and discord.utils.utcnow() < cached[0]:
+        return cached[1], cached[2]
+    if _inflight is None:
+        _inflight = asyncio.ensure_future(_fetch())
+    # a caller that gives up must not cancel the fetch the others wait on
+    return await asyncio.shield(_inflight)
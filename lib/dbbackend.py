@@ -0,0 +1,255 @@
+"""Storage backends for lib.dbfuncs, selected with config.DB_BACKEND.
+
+    DB_BACKEND = "postgres"  # default, the DB_NAME/DB_USER/... server
+    DB_BACKEND = "sqlite"    # embedded database file at DB_SQLITE_PATH
+
+dbfuncs queries are written for psycopg2 (%s / %(name)s placeholders,
+`= ANY(%s)` with a list, FOR UPDATE). The SQLite backend rewrites them on
+the fly and wraps sqlite3 connections so they behave like psycopg2 ones to
+the pool and to transaction(): every statement runs inside a transaction
+that is only ended by commit() or rollback(), and a failed statement marks
+the transaction as failed so it is rolled back instead of committed.
+"""
+
+import datetime
+import os
+import re
+import sqlite3
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import execute_batch
+import config
+
+
+class PostgresBackend:
+    name = "postgres"
+    Error = psycopg2.Error
+    cursor_base = extensions.cursor
+
+    def connect(self):
+        return psycopg2.connect(
+            database=config.DB_NAME,
+            user=config.DB_USER,
+            password=config.DB_PASS,
+            host=config.DB_IP,
+            port=getattr(config, "DB_PORT", 5432),
+        )
+
+    @property
+    def has_replica(self):
+        return bool(getattr(config, "DB_REPLICA_IP", None))
+
+    def connect_replica(self):
+        return psycopg2.connect(
+            database=getattr(config, "DB_REPLICA_NAME", config.DB_NAME),
+            user=getattr(config, "DB_REPLICA_USER", config.DB_USER),
+            password=getattr(config, "DB_REPLICA_PASS", config.DB_PASS),
+            host=config.DB_REPLICA_IP,
+            port=getattr(config, "DB_REPLICA_PORT", getattr(config, "DB_PORT", 5432)),
+        )
+
+    def is_transient(self, error):
+        return isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError))
+
+    def in_failed_transaction(self, connection):
+        status = connection.get_transaction_status()
+        return status == extensions.TRANSACTION_STATUS_INERROR
+
+    def execute_batch(self, cursor, sql, argslist):
+        execute_batch(cursor, sql, argslist)
+
+    def execute_script(self, cursor, sql):
+        cursor.execute(sql)
+
+    def refresh_view(self, cursor, name):
+        cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name};")
+
+
+# = ANY(%s) / = ANY(%(name)s), a plain placeholder, or an escaped percent
+_PLACEHOLDER = re.compile(r"=\s*ANY\s*\(\s*(%s|%\(\w+\)s)\s*\)|%s|%\((\w+)\)s|%%")
+# row locks; SQLite locks the whole database for the writing transaction
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.IGNORECASE)
+
+
+def translate(sql, params=None):
+    """Rewrite a psycopg2 statement and its parameters for sqlite3.
+
+    `x = ANY(%s)` becomes `x IN (?, ?, ...)` with the list spread out, so
+    the returned parameters are always a flat tuple or a dict. Row locking
+    clauses are dropped."""
+    sql = _FOR_UPDATE.sub("", sql)
+    if params is None:
+        return sql, ()
+    named = isinstance(params, dict)
+    out = {} if named else []
+    positional = iter(() if named else params)
+
+    def replace(match):
+        token = match.group(0)
+        if token == "%%":
+            return "%"
+        if match.group(1):  # = ANY(...)
+            inner = match.group(1)
+            value = params[inner[2:-2]] if named else next(positional)
+            values = list(value) if isinstance(value, (list, tuple)) else [value]
+            if named:
+                keys = [f"{inner[2:-2]}_{i}" for i in range(len(values))]
+                out.update(zip(keys, values))
+                return "IN (" + ", ".join(f":{key}" for key in keys) + ")"
+            out.extend(values)
+            return "IN (" + ", ".join("?" * len(values)) + ")"
+        if named:
+            out[match.group(2)] = params[match.group(2)]
+            return f":{match.group(2)}"
+        out.append(next(positional))
+        return "?"
+
+    sql = _PLACEHOLDER.sub(replace, sql)
+    return sql, out if named else tuple(out)
+
+
+def translate_many(sql):
+    """Rewrite the placeholders of an executemany() statement for sqlite3."""
+
+    def replace(match):
+        if match.group(0) == "%%":
+            return "%"
+        return f":{match.group(2)}" if match.group(2) else "?"
+
+    return _PLACEHOLDER.sub(replace, sql)
+
+
+class SQLiteCursor(sqlite3.Cursor):
+    """sqlite3 cursor that accepts psycopg2-style statements and opens a
+    transaction before the first statement, like psycopg2 does. A failing
+    statement marks the SQLiteConnection it belongs to as failed."""
+
+    owner = None  # the SQLiteConnection that created this cursor
+
+    def _begin(self):
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN")
+
+    def _failed(self):
+        if self.owner is not None:
+            self.owner.failed = True
+
+    def execute(self, query, vars=None):
+        try:
+            self._begin()
+            query, vars = translate(query, vars)
+            return super().execute(query, vars)
+        except sqlite3.Error:
+            self._failed()
+            raise
+
+    def executemany(self, query, vars_list):
+        try:
+            self._begin()
+            return super().executemany(translate_many(query), vars_list)
+        except sqlite3.Error:
+            self._failed()
+            raise
+
+
+class SQLiteConnection:
+    """The parts of the psycopg2 connection interface that DBPool and
+    lib.dbfuncs use, on top of a sqlite3 connection."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.closed = 0
+        # a statement failed since the last commit or rollback; psycopg2
+        # reports that as TRANSACTION_STATUS_INERROR
+        self.failed = False
+
+    def cursor(self, cursor_factory=SQLiteCursor):
+        cursor = self._connection.cursor(cursor_factory)
+        cursor.owner = self
+        return cursor
+
+    def get_transaction_status(self):
+        if self.failed:
+            return extensions.TRANSACTION_STATUS_INERROR
+        if self._connection.in_transaction:
+            return extensions.TRANSACTION_STATUS_INTRANS
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        self._connection.commit()
+        self.failed = False
+
+    def rollback(self):
+        self._connection.rollback()
+        self.failed = False
+
+    def close(self):
+        self.closed = 1
+        self._connection.close()
+
+
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter(
+    "TIMESTAMP", lambda value: datetime.datetime.fromisoformat(value.decode())
+)
+sqlite3.register_converter("BOOLEAN", lambda value: bool(int(value)))
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    Error = sqlite3.Error
+    cursor_base = SQLiteCursor
+    has_replica = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(
+            self.path,
+            timeout=getattr(config, "DB_POOL_TIMEOUT", 10),
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,  # SQLiteCursor manages transactions
+            check_same_thread=False,  # pooled across the executor threads
+        )
+        connection.execute("PRAGMA foreign_keys = ON;")
+        connection.execute("PRAGMA journal_mode = WAL;")
+        return SQLiteConnection(connection)
+
+    def is_transient(self, error):
+        # OperationalError also covers SQL errors like "no such table"
+        return isinstance(error, sqlite3.OperationalError) and any(
+            reason in str(error)
+            for reason in ("locked", "busy", "unable to open", "disk I/O")
+        )
+
+    def in_failed_transaction(self, connection):
+        # SQLite itself keeps going after a failed statement; roll back like
+        # PostgreSQL does so callers that handle the error see the same result
+        return connection.failed
+
+    def execute_batch(self, cursor, sql, argslist):
+        cursor.executemany(sql, argslist)
+
+    def execute_script(self, cursor, sql):
+        statement = ""
+        for line in sql.splitlines(keepends=True):
+            statement += line
+            if sqlite3.complete_statement(statement):
+                cursor.execute(statement)
+                statement = ""
+
+    def refresh_view(self, cursor, name):
+        # materialized views are plain views on SQLite, always current
+        pass
+
+
+def create_backend():
+    name = getattr(config, "DB_BACKEND", "postgres")
+    if name == "postgres":
+        return PostgresBackend()
+    if name == "sqlite":
+        return SQLiteBackend(getattr(config, "DB_SQLITE_PATH", "data/leaderboard.db"))
+    raise ValueError(f"Unknown DB_BACKEND {name!r} (expected 'postgres' or 'sqlite')")
@@ -0,0 +1,90 @@
+import threading
+import time
+
+
+class DatabaseUnavailable(Exception):
+    """The database could not be reached, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops calling the database after `failure_threshold` consecutive
+    transient failures. After `reset_timeout` seconds one trial call is let
+    through (half open); it closes the breaker on success and reopens it on
+    failure."""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._trips = 0
+        self._rejected = 0
+        self._retries = 0
+
+    def _current_state(self):
+        if (
+            self._state == "open"
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            return "half_open"
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def before_call(self):
+        with self._lock:
+            state = self._current_state()
+            if state == "open" or (state == "half_open" and self._trial_running):
+                self._rejected += 1
+                raise DatabaseUnavailable("Database circuit breaker is open")
+            if state == "half_open":
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            trial = self._trial_running
+            self._trial_running = False
+            if trial or self._failures >= self.failure_threshold:
+                if self._state != "open" or trial:
+                    self._trips += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def cancel_call(self):
+        """The call allowed by before_call() never reached the database, so
+        it says nothing about its health."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_retry(self):
+        with self._lock:
+            self._retries += 1
+
+    def stats(self):
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "open_for_s": (
+                    max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+                    if state == "open"
+                    else 0.0
+                ),
+                "trips": self._trips,
+                "rejected": self._rejected,
+                "retries": self._retries,
+            }
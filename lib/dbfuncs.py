@@ -1,201 +1,614 @@
-import psycopg2
-import re
-import requests
 from functools import wraps
+from contextlib import contextmanager
+import contextvars
+import datetime
 import os
+import random
 import time
 import sys
+import threading
 import traceback
 
 sys.path.append(os.path.abspath("../"))
 import config
+from lib.dbpool import DBPool, PoolTimeout
+from lib.dbbackend import create_backend
+from lib.dbbreaker import CircuitBreaker, DatabaseUnavailable
+import lib.dbmetrics as dbmetrics
+from lib.registry import UserRegistry
+from lib.solved import SolvedIndex
+
+_backend = None
+_pool = None
+_replica_pool = None
+_replica_down_until = 0.0
+_pool_lock = threading.Lock()
+
+
+def get_backend():
+    """The storage backend chosen by config.DB_BACKEND (see lib.dbbackend)."""
+    global _backend
+    if _backend is None:
+        with _pool_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def _create_pool(connect):
+    return DBPool(
+        min_size=getattr(config, "DB_POOL_MIN", 1),
+        max_size=getattr(config, "DB_POOL_MAX", 10),
+        timeout=getattr(config, "DB_POOL_TIMEOUT", 10),
+        health_check_idle=getattr(config, "DB_POOL_HEALTHCHECK_IDLE", 30),
+        max_idle=getattr(config, "DB_POOL_MAX_IDLE", 300),
+        connect=connect,
+    )
 
 
-class DBConnection:
-    def __init__(self):
-        self.connection = psycopg2.connect(
-            database=config.DB_NAME,
-            user=config.DB_USER,
-            password=config.DB_PASS,
-            host=config.DB_IP,
-            port=5432,
+def get_pool():
+    """Process-wide connection pool, created on first use."""
+    global _pool
+    if _pool is None:
+        backend = get_backend()
+        with _pool_lock:
+            if _pool is None:
+                _pool = _create_pool(backend.connect)
+    return _pool
+
+
+def get_replica_pool():
+    """Pool for the read replica, or None if no replica is configured."""
+    global _replica_pool
+    if _replica_pool is None:
+        backend = get_backend()
+        if not backend.has_replica:
+            return None
+        with _pool_lock:
+            if _replica_pool is None:
+                _replica_pool = _create_pool(backend.connect_replica)
+    return _replica_pool
+
+
+breaker = CircuitBreaker(
+    failure_threshold=getattr(config, "DB_BREAKER_FAILURES", 5),
+    reset_timeout=getattr(config, "DB_BREAKER_RESET_SECONDS", 30),
+)
+
+
+def is_transient(error):
+    """Errors worth retrying and counting against the circuit breaker: lost
+    connections, failed connects and an exhausted pool."""
+    return isinstance(error, PoolTimeout) or get_backend().is_transient(error)
+
+
+def get_breaker_stats():
+    return breaker.stats()
+
+
+def get_pool_stats():
+    return _pool.stats() if _pool is not None else None
+
+
+def get_replica_pool_stats():
+    return _replica_pool.stats() if _replica_pool is not None else None
+
+
+def close_pool():
+    if _pool is not None:
+        _pool.closeall()
+    if _replica_pool is not None:
+        _replica_pool.closeall()
+
+
+_statement_count = contextvars.ContextVar("dbfuncs_statement_count", default=None)
+_current_function = contextvars.ContextVar("dbfuncs_current_function", default=None)
+
+
+class InstrumentedCursorMixin:
+    """Times every statement for the slow query log and, when
+    DB_DEBUG_QUERIES is on, counts statements against the interaction being
+    handled (see track_queries). Mixed into the backend's cursor class."""
+
+    def execute(self, query, vars=None):
+        counter = _statement_count.get()
+        if counter is not None:
+            counter[0] += 1
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            dbmetrics.record_statement(
+                _current_function.get() or "transaction",
+                query,
+                vars,
+                time.perf_counter() - start,
+            )
+
+    def executemany(self, query, vars_list):
+        counter = _statement_count.get()
+        if counter is not None:
+            counter[0] += 1
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            dbmetrics.record_statement(
+                _current_function.get() or "transaction",
+                query,
+                None,
+                time.perf_counter() - start,
+            )
+
+
+_cursor_classes = {}
+
+
+def _cursor_class(backend):
+    cursor_class = _cursor_classes.get(backend.name)
+    if cursor_class is None:
+        cursor_class = _cursor_classes[backend.name] = type(
+            "InstrumentedCursor", (InstrumentedCursorMixin, backend.cursor_base), {}
         )
-        self.cursor = self.connection.cursor()
+    return cursor_class
+
+
+class DBConnection:
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
+        self.connection = self.pool.getconn()
+        try:
+            self.cursor = self.connection.cursor(
+                cursor_factory=_cursor_class(get_backend())
+            )
+        except Exception:
+            self.pool.putconn(self.connection, discard=True)
+            raise
 
     def close(self):
-        self.cursor.close()
-        self.connection.close()
+        try:
+            self.cursor.close()
+        finally:
+            self.pool.putconn(self.connection)
 
 
-def with_db(func):
-    """Decorator to handle database connection and cursor."""
+def uses_db(func):
+    """Mark a function that may query the database so lib.asyncdb exposes it."""
+    func.uses_db = True
+    return func
 
-    @wraps(func)
-    def wrapper(*args, **kwargs):
+
+_active_cursor = contextvars.ContextVar("dbfuncs_active_cursor", default=None)
+_active_on_replica = contextvars.ContextVar("dbfuncs_active_on_replica", default=False)
+# [wrote] for the interaction being handled, set by track_queries
+_wrote_primary = contextvars.ContextVar("dbfuncs_wrote_primary", default=None)
+
+
+def _mark_replica_down(error):
+    """Send reads to the primary for the next DB_REPLICA_RETRY_SECONDS."""
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + getattr(
+        config, "DB_REPLICA_RETRY_SECONDS", 30
+    )
+    print(f"[REPLICA] Falling back to primary: {error}".rstrip())
+
+
+def _read_connection():
+    """A replica connection for a read-only transaction, or None to use the
+    primary: no replica configured, the replica is failing, or this
+    interaction already wrote and DB_READ_YOUR_WRITES is on."""
+    wrote = _wrote_primary.get()
+    if wrote and wrote[0] and getattr(config, "DB_READ_YOUR_WRITES", True):
+        return None
+    if time.monotonic() < _replica_down_until:
+        return None
+    try:
+        pool = get_replica_pool()
+        return DBConnection(pool) if pool is not None else None
+    except (PoolTimeout, get_backend().Error) as e:
+        _mark_replica_down(e)
+        return None
+
+
+@contextmanager
+def transaction(name="transaction", read_only=False):
+    """Run every dbfuncs call made inside the block on one connection and
+    commit once at the end. Nested blocks join the outer one, except that a
+    write inside a read-only block on the replica gets its own primary
+    transaction. Read-only blocks go to the replica when there is one."""
+    cursor = _active_cursor.get()
+    if cursor is not None and (read_only or not _active_on_replica.get()):
+        yield cursor
+        return
+
+    start = time.perf_counter()
+    conn = _read_connection() if read_only else None
+    on_replica = conn is not None
+    if conn is None:
         conn = DBConnection()
-        try:
-            result = func(conn.cursor, *args, **kwargs)
+    dbmetrics.observe(name, "connect", time.perf_counter() - start)
+    token = _active_cursor.set(conn.cursor)
+    replica_token = _active_on_replica.set(on_replica)
+    try:
+        yield conn.cursor
+        start = time.perf_counter()
+        if get_backend().in_failed_transaction(conn.connection):
+            # a statement failed and the error was handled by the caller;
+            # committing an aborted transaction is a rollback anyway
+            conn.connection.rollback()
+        else:
             conn.connection.commit()
-            return result
-        except Exception as e:
+            wrote = _wrote_primary.get()
+            if wrote is not None and not read_only:
+                wrote[0] = True
+        dbmetrics.observe(name, "commit", time.perf_counter() - start)
+    except Exception as e:
+        if on_replica and is_transient(e):
+            _mark_replica_down(e)
+        elif is_transient(e):
+            print(f"[DB] {name} failed: {e}".rstrip())
+        else:
             print(traceback.format_exc())
+        try:
             conn.connection.rollback()
-            raise e
-        finally:
-            conn.close()
+        except get_backend().Error:
+            # broken connection; the pool discards it on return
+            pass
+        raise e
+    finally:
+        _active_on_replica.reset(replica_token)
+        _active_cursor.reset(token)
+        conn.close()
+
+
+def with_db(func=None, *, read_only=False):
+    """Decorator to handle database connection and cursor. Calls made while a
+    transaction() is active reuse its cursor. Connect, execute and commit
+    times are recorded in lib.dbmetrics under the function's name.
+
+    Use @with_db(read_only=True) for functions that never write so they can
+    be served by the read replica and are retried on transient errors.
+
+    Outermost calls go through the circuit breaker and raise
+    DatabaseUnavailable when it is open or the database cannot be reached."""
+    if func is None:
+        return lambda func: with_db(func, read_only=read_only)
+    name = func.__name__
+
+    def call(on_replica, *args, **kwargs):
+        with transaction(name, read_only) as cursor:
+            on_replica[0] = _active_on_replica.get()
+            token = _current_function.set(name)
+            start = time.perf_counter()
+            try:
+                return func(cursor, *args, **kwargs)
+            except Exception:
+                dbmetrics.record_error(name)
+                raise
+            finally:
+                dbmetrics.observe(name, "execute", time.perf_counter() - start)
+                _current_function.reset(token)
 
-    return wrapper
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active_cursor.get() is not None:
+            # part of an outer call, which owns retries and the breaker
+            return call([False], *args, **kwargs)
+
+        attempts = getattr(config, "DB_RETRY_ATTEMPTS", 3) if read_only else 1
+        attempt = 0
+        replica_failed = False
+        while True:
+            on_replica = [False]
+            breaker.before_call()
+            try:
+                result = call(on_replica, *args, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    # the database answered; the error is the caller's
+                    breaker.record_success()
+                    raise
+                if on_replica[0] and not replica_failed:
+                    # the replica failed, not the primary the breaker guards;
+                    # transaction() took it out of rotation, so the retry
+                    # goes to the primary
+                    breaker.cancel_call()
+                    replica_failed = True
+                    continue
+                breaker.record_failure()
+                attempt += 1
+                if attempt == attempts:
+                    raise DatabaseUnavailable(f"{name}: {e}".rstrip()) from e
+                breaker.record_retry()
+                time.sleep(_backoff(attempt - 1))
+            else:
+                breaker.record_success()
+                return result
+
+    return uses_db(wrapper)
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff in seconds."""
+    base = getattr(config, "DB_RETRY_BASE_DELAY", 0.1)
+    cap = getattr(config, "DB_RETRY_MAX_DELAY", 2.0)
+    return random.uniform(0, min(cap, base * 2**attempt))
 
 
 def track_queries(func):
     @wraps(func)
     async def wrapper(self, interaction, *args, **kwargs):
-        update_query_count(interaction.user.id, interaction.user.name)
-        return await func(self, interaction, *args, **kwargs)
+        record_query(interaction.user.id, interaction.user.name)
+        wrote_token = _wrote_primary.set([False])
+        if not getattr(config, "DB_DEBUG_QUERIES", False):
+            try:
+                return await func(self, interaction, *args, **kwargs)
+            finally:
+                _wrote_primary.reset(wrote_token)
+
+        counter = [0]
+        token = _statement_count.set(counter)
+        try:
+            return await func(self, interaction, *args, **kwargs)
+        finally:
+            _statement_count.reset(token)
+            _wrote_primary.reset(wrote_token)
+            limit = getattr(config, "DB_QUERY_WARN_THRESHOLD", 5)
+            if counter[0] > limit:
+                print(
+                    f"[N+1] /{getattr(interaction.command, 'name', func.__name__)} "
+                    f"issued {counter[0]} statements "
+                    f"(limit {limit}) for {interaction.user.name}"
+                )
 
     return wrapper
 
 
+# discord_id -> [pending query count, latest discord name]
+_pending_queries = {}
+_pending_queries_lock = threading.Lock()
+
+
+def record_query(discord_id: int, discord_user: str):
+    """Count a tracked command in memory; flush_query_counts() writes it out."""
+    with _pending_queries_lock:
+        pending = _pending_queries.get(discord_id)
+        if pending is None:
+            _pending_queries[discord_id] = [1, discord_user]
+        else:
+            pending[0] += 1
+            pending[1] = discord_user
+
+
 @with_db
-def update_query_count(cursor, discord_id: int, discord_user: str):
+def _write_query_counts(cursor, pending):
+    renames = []
+    for discord_id, (_, discord_user) in pending.items():
+        row = registry.by_discord_id(discord_id)
+        current = registry.value(row, "discord_name") if row else None
+        if current is None or current.lower() != discord_user.lower():
+            renames.append((discord_user, discord_id, discord_user))
+
+    get_backend().execute_batch(
+        cursor,
+        """
+        UPDATE users SET discord_name = %s
+        WHERE discord_id = %s
+        AND (discord_name IS NULL OR LOWER(discord_name) <> LOWER(%s));
+        """,
+        renames,
+    )
+    get_backend().execute_batch(
+        cursor,
+        """
+        INSERT INTO queries (user_id, discord_id, queries)
+        SELECT id, discord_id, %s FROM users WHERE discord_id = %s
+        ON CONFLICT (user_id) DO UPDATE SET queries = queries.queries + EXCLUDED.queries;
+        """,
+        [(count, discord_id) for discord_id, (count, _) in pending.items()],
+    )
+    return renames
+
+
+@uses_db
+def flush_query_counts():
+    """Write buffered query counts and discord name changes in one batch.
+    Returns the number of queries written."""
+    with _pending_queries_lock:
+        pending = dict(_pending_queries)
+        _pending_queries.clear()
+    if not pending:
+        return 0
+
     try:
-        cursor.execute(
-            "SELECT id, discord_id, discord_name FROM users WHERE discord_id = %s;",
-            (discord_id,),
-        )
-        result = cursor.fetchone()
-        if not result:
-            print(
-                f"[TRACKING] No user found for discord_user '{discord_user},{discord_id}'"
-            )
-            return
-        user_id, current_discord_id, current_discord_name = result
-
-        if (
-            current_discord_name is None
-            or current_discord_name.lower() != discord_user.lower()
-        ):
-            cursor.execute(
-                "UPDATE users SET discord_name = %s WHERE id = %s;",
-                (discord_user, user_id),
-            )
+        renames = _write_query_counts(pending)
+    except Exception:
+        # put the counts back so the next flush retries them
+        with _pending_queries_lock:
+            for discord_id, (count, discord_user) in pending.items():
+                current = _pending_queries.setdefault(discord_id, [0, discord_user])
+                current[0] += count
+        raise
 
-        cursor.execute("SELECT 1 FROM queries WHERE user_id = %s;", (user_id,))
-        if cursor.fetchone():
-            cursor.execute(
-                "UPDATE queries SET queries = queries + 1 WHERE user_id = %s;",
-                (user_id,),
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO queries (user_id, discord_id, queries) VALUES (%s, %s, %s);",
-                (user_id, discord_id, 1),
-            )
+    for discord_user, discord_id, _ in renames:
+        registry.rename(discord_id, discord_user)
+    return sum(count for count, _ in pending.values())
 
-    except Exception as e:
-        print("[TRACKING]: Error tracking! See error")
-        traceback.print_exc()
+
+registry = UserRegistry()
+
+_USER_LOOKUPS = {
+    "discord_id": "SELECT * FROM users WHERE discord_id = %s;",
+    "discord_name": "SELECT * FROM users WHERE LOWER(discord_name) = LOWER(%s);",
+    "username": "SELECT * FROM users WHERE LOWER(username) = LOWER(%s);",
+}
+
+
+def _columns(cursor):
+    return [column[0] for column in cursor.description]
 
 
 @with_db
-def check_leetcode_user(cursor, leetcode_username):
-    cursor.execute(
-        "SELECT * FROM users WHERE LOWER(username) = LOWER(%s);",
-        (leetcode_username,),
-    )
-    return cursor.fetchall()
+def load_registry(cursor):
+    cursor.execute("SELECT * FROM users;")
+    rows = cursor.fetchall()
+    registry.load(_columns(cursor), rows)
+    return len(rows)
+
+
+@with_db(read_only=True)
+def _fetch_user(cursor, column, value):
+    cursor.execute(_USER_LOOKUPS[column], (value,))
+    row = cursor.fetchone()
+    if row:
+        registry.upsert(_columns(cursor), row)
+    return row
+
+
+@uses_db
+def find_user(discord_id=None, discord_name=None, leetcode_username=None):
+    """Return the users row for one of the given keys, checking the registry
+    before falling back to the database."""
+    if discord_id is not None:
+        return registry.by_discord_id(discord_id) or _fetch_user(
+            "discord_id", discord_id
+        )
+    if discord_name is not None:
+        return registry.by_discord_name(discord_name) or _fetch_user(
+            "discord_name", discord_name
+        )
+    if leetcode_username is not None:
+        return registry.by_leetcode(leetcode_username) or _fetch_user(
+            "username", leetcode_username
+        )
+    return None
+
+
+@uses_db
+def check_leetcode_user(leetcode_username):
+    row = find_user(leetcode_username=leetcode_username)
+    return [row] if row else []
+
+
+@uses_db
+def check_discord_user(discord_username):
+    row = find_user(discord_name=discord_username)
+    return [row] if row else []
+
+
+@uses_db
+def get_leetcode_from_discord(discord_username):
+    row = find_user(discord_name=discord_username)
+    return registry.value(row, "username") if row else None
+
+
+@uses_db
+def get_discord_from_leetcode(leetcode_username):
+    row = find_user(leetcode_username=leetcode_username)
+    return registry.value(row, "discord_name") if row else None
+
+
+@uses_db
+def check_discord_id(discord_id):
+    row = find_user(discord_id=discord_id)
+    return [row] if row else []
+
+
+@uses_db
+def get_leetcode_from_discord_id(discord_id):
+    row = find_user(discord_id=discord_id)
+    return registry.value(row, "username") if row else None
+
+
+@uses_db
+def get_user_id(discord_id):
+    """users.id for a discord id, from the registry or one indexed lookup."""
+    row = find_user(discord_id=discord_id)
+    return registry.value(row, "id") if row else None
 
 
 @with_db
-def check_discord_user(cursor, discord_username):
+def _insert_user(cursor, discord_username, discord_id, leetcode_username):
     cursor.execute(
-        "SELECT * FROM users WHERE LOWER(discord_name) = LOWER(%s);",
-        (discord_username,),
+        """
+        INSERT INTO users (username, discord_id, discord_name)
+        VALUES (LOWER(%s), %s, %s)
+        ON CONFLICT (username) DO NOTHING;
+        """,
+        (leetcode_username, discord_id, discord_username),
     )
-    return cursor.fetchall()
 
+    cursor.execute(_USER_LOOKUPS["username"], (leetcode_username,))
+    user_row = cursor.fetchone()
+    columns = _columns(cursor)
+    user_id = user_row[columns.index("id")]
 
-@with_db
-def get_leetcode_from_discord(cursor, discord_username):
     cursor.execute(
-        "SELECT username FROM users WHERE LOWER(discord_name) = LOWER(%s);",
-        (discord_username,),
+        "INSERT INTO points (user_id, points, wins) VALUES (%s, 0, 0) ON CONFLICT (user_id) DO NOTHING;",
+        (user_id,),
     )
-    record = cursor.fetchall()
-    return record[0][0] if record else None
 
+    cursor.execute(
+        "INSERT INTO queries (user_id, discord_id, queries) VALUES (%s, %s, 1) ON CONFLICT (user_id) DO NOTHING;",
+        (user_id, discord_id),
+    )
 
-@with_db
-def get_discord_from_leetcode(cursor, leetcode_username):
     cursor.execute(
-        "SELECT discord_name FROM users WHERE LOWER(username) = LOWER(%s);",
-        (leetcode_username,),
+        """
+        INSERT INTO last_completed (user_id, problem_name, completed_at)
+        VALUES (%s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id) DO NOTHING;
+        """,
+        (user_id, "PLACEHOLDERPROBLEMNAMEFORINITIALREGISTRATION"),
     )
-    record = cursor.fetchall()
-    return record[0][0] if record else None
+    return columns, user_row
 
 
-@with_db
-def add_user(cursor, discord_username, discord_id, leetcode_username):
+@uses_db
+def add_user(discord_username, discord_id, leetcode_username):
     try:
-        cursor.execute(
-            """
-            INSERT INTO users (username, discord_id, discord_name)
-            VALUES (LOWER(%s), %s, %s)
-            ON CONFLICT (username) DO NOTHING;
-            """,
-            (leetcode_username, discord_id, discord_username),
-        )
-
-        cursor.execute(
-            "SELECT id FROM users WHERE LOWER(username) = LOWER(%s);",
-            (leetcode_username,),
-        )
-        user_id = cursor.fetchone()[0]
-
-        cursor.execute(
-            "INSERT INTO points (user_id, points, wins) VALUES (%s, 0, 0) ON CONFLICT (user_id) DO NOTHING;",
-            (user_id,),
-        )
-
-        cursor.execute(
-            "INSERT INTO queries (user_id, discord_id, queries) VALUES (%s, %s, 1) ON CONFLICT (user_id) DO NOTHING;",
-            (user_id, discord_id),
-        )
-
-        cursor.execute(
-            """
-            INSERT INTO last_completed (user_id, problem_name, completed_at)
-            VALUES (%s, %s, CURRENT_TIMESTAMP)
-            ON CONFLICT (user_id) DO NOTHING;
-            """,
-            (user_id, "PLACEHOLDERPROBLEMNAMEFORINITIALREGISTRATION"),
+        columns, user_row = _insert_user(
+            discord_username, discord_id, leetcode_username
         )
-
-        return True, ""
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         return False, str(e)
+    # the caches only learn about the user once the insert has committed
+    registry.upsert(columns, user_row)
+    return True, ""
 
 
 @with_db
-def remove_user(cursor, discord_id):
-    try:
-        cursor.execute("SELECT id FROM users WHERE discord_id = %s;", (discord_id,))
-        result = cursor.fetchone()
-        if not result:
-            return False, f"No user found with discord_id {discord_id}"
+def _delete_user(cursor, discord_id):
+    cursor.execute("SELECT id FROM users WHERE discord_id = %s;", (discord_id,))
+    result = cursor.fetchone()
+    if not result:
+        return None
 
-        user_id = result[0]
+    user_id = result[0]
 
-        cursor.execute("DELETE FROM last_completed WHERE user_id = %s;", (user_id,))
-        cursor.execute("DELETE FROM user_submissions WHERE user_id = %s;", (user_id,))
-        cursor.execute("DELETE FROM points WHERE user_id = %s;", (user_id,))
-        cursor.execute("DELETE FROM queries WHERE user_id = %s;", (user_id,))
-        cursor.execute("DELETE FROM users WHERE id = %s;", (user_id,))
+    cursor.execute("DELETE FROM last_completed WHERE user_id = %s;", (user_id,))
+    cursor.execute("DELETE FROM user_submissions WHERE user_id = %s;", (user_id,))
+    cursor.execute("DELETE FROM points WHERE user_id = %s;", (user_id,))
+    cursor.execute("DELETE FROM queries WHERE user_id = %s;", (user_id,))
+    cursor.execute("DELETE FROM users WHERE id = %s;", (user_id,))
+    return user_id
 
-        return True, ""
+
+@uses_db
+def remove_user(discord_id):
+    try:
+        user_id = _delete_user(discord_id)
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         return False, str(e)
+    if user_id is None:
+        return False, f"No user found with discord_id {discord_id}"
+    registry.remove(discord_id)
+    solved.remove_user(user_id)
+    return True, ""
 
 
 @with_db
@@ -208,12 +621,13 @@ def add_points(cursor, discord_user, leetcode_user, points):
             "UPDATE points SET points = points + %s WHERE user_id = (SELECT id FROM users WHERE LOWER(username) = LOWER(%s));",
             (points, leetcode_username),
         )
+        # /top10 catches up on the next housekeeping refresh_leaderboard tick
         return True, ""
     except Exception as e:
         return False, str(e)
 
 
-@with_db
+@with_db(read_only=True)
 def get_user_points(cursor, discord_user):
     try:
         leetcode_username = get_leetcode_from_discord(discord_user)
@@ -226,43 +640,189 @@ def get_user_points(cursor, discord_user):
         return None
 
 
-@with_db
-def get_win_history(cursor, original_rows=False):
+@with_db(read_only=True)
+def get_win_history(
+    cursor, original_rows=False, limit=10, offset=0, discord_id=None, before=None
+):
+    """Latest wins, newest first. Page with offset, or pass the timestamp of
+    the last row seen as `before`; discord_id restricts it to one user."""
     cursor.execute(
-        "SELECT username, timestamp FROM win_history JOIN users ON win_history.user_id = users.id ORDER BY timestamp DESC LIMIT 10;"
+        """
+        SELECT users.discord_name, users.username, win_history.timestamp
+        FROM win_history JOIN users ON win_history.user_id = users.id
+        WHERE (%(discord_id)s IS NULL OR users.discord_id = %(discord_id)s)
+        AND (%(before)s IS NULL OR win_history.timestamp < %(before)s)
+        ORDER BY win_history.timestamp DESC
+        LIMIT %(limit)s OFFSET %(offset)s;
+        """,
+        {
+            "discord_id": discord_id,
+            "before": before,
+            "limit": limit,
+            "offset": offset,
+        },
     )
     result = cursor.fetchall()
     if len(result) == 0:
         return None
     if original_rows:
-        return result
-    data = [list(row) for row in result]
-    for row in data:
-        row[1] = time.mktime(row[1].timetuple())
-        row.append(get_discord_from_leetcode(row[0]))
-        row[0], row[1], row[2] = row[2], row[0], row[1]
-    return data
+        return [(username, timestamp) for _, username, timestamp in result]
+    return [
+        [discord_name, username, time.mktime(timestamp.timetuple())]
+        for discord_name, username, timestamp in result
+    ]
 
 
 @with_db
-def get_points(cursor, problem_slug=None):
-    if not problem_slug:
-        return -1
+def refresh_leaderboard(cursor):
+    get_backend().refresh_view(cursor, "leaderboard")
+
+
+@with_db(read_only=True)
+def get_leaderboard(cursor, limit=10, offset=0):
+    """Leaderboard rows in rank order, as dicts shaped like the web server's
+    /leaderboard entries plus rank and wins."""
     cursor.execute(
-        "SELECT points FROM difficulty WHERE titleslug = %s;",
-        (problem_slug,),
+        """
+        SELECT rank, username, discord_name, points, wins
+        FROM leaderboard
+        ORDER BY rank, username
+        LIMIT %s OFFSET %s;
+        """,
+        (limit, offset),
     )
-    result = cursor.fetchall()
-    return result[0][0] if result else None
+    return [
+        {
+            "rank": rank,
+            "username": username,
+            "discord_username": discord_name,
+            "points": points,
+            "wins": wins,
+        }
+        for rank, username, discord_name, points, wins in cursor.fetchall()
+    ]
 
 
-@with_db
+# titleslug -> points, the whole difficulty table; see load_difficulties()
+_difficulties = None
+
+
+@with_db(read_only=True)
+def load_difficulties(cursor):
+    """(Re)load the difficulty table into memory and return its size."""
+    global _difficulties
+    cursor.execute("SELECT titleslug, points FROM difficulty;")
+    _difficulties = dict(cursor.fetchall())
+    return len(_difficulties)
+
+
+def _difficulty_map():
+    if _difficulties is None:
+        load_difficulties()
+    return _difficulties
+
+
+@uses_db
+def get_points(problem_slug=None):
+    if not problem_slug:
+        return -1
+    return _difficulty_map().get(problem_slug)
+
+
+@uses_db
+def get_points_many(problem_slugs):
+    """Points for each slug as a dict; unknown slugs map to None."""
+    difficulties = _difficulty_map()
+    return {slug: difficulties.get(slug) for slug in problem_slugs}
+
+
+@with_db(read_only=True)
 def get_last_reset(cursor):
     cursor.execute("SELECT last_reset, reset_interval FROM reset;")
     result = cursor.fetchall()
     return result if result else None
 
 
+@with_db
+def run_reset(cursor, now=None):
+    """End the leaderboard period if reset.last_reset + reset_interval has
+    passed: archive the standings into points_history, record the winner in
+    win_history, zero points and move last_reset forward, all in this one
+    transaction. Returns (period_end, winner user id or None), or None if no
+    reset is due. Re-running after a crash is safe since nothing is visible
+    until the commit that also moves last_reset."""
+    now = now or datetime.datetime.now()
+    cursor.execute("SELECT last_reset, reset_interval FROM reset FOR UPDATE;")
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    last_reset, reset_interval = row
+    interval = datetime.timedelta(days=reset_interval)
+    if now < last_reset + interval:
+        return None
+    # if the bot was down across several periods, close them as one
+    period_end = last_reset + (now - last_reset) // interval * interval
+
+    cursor.execute(
+        """
+        INSERT INTO points_history (period_end, user_id, points, wins, rank)
+        SELECT %s, user_id, points, wins, RANK() OVER (ORDER BY points DESC)
+        FROM points
+        WHERE true -- keeps SQLite from reading ON CONFLICT as a join clause
+        ON CONFLICT DO NOTHING;
+        """,
+        (period_end,),
+    )
+    cursor.execute(
+        """
+        INSERT INTO win_history (user_id, timestamp)
+        SELECT user_id, %s FROM points
+        WHERE points > 0
+        ORDER BY points DESC, wins DESC, user_id
+        LIMIT 1
+        RETURNING user_id;
+        """,
+        (period_end,),
+    )
+    winner = cursor.fetchone()
+    winner = winner[0] if winner else None
+    cursor.execute(
+        """
+        UPDATE points
+        SET points = 0,
+            wins = wins + CASE WHEN user_id = %(winner)s THEN 1 ELSE 0 END
+        WHERE points <> 0 OR user_id = %(winner)s;
+        """,
+        {"winner": winner},
+    )
+    cursor.execute("UPDATE reset SET last_reset = %s;", (period_end,))
+    refresh_leaderboard()
+    return period_end, winner
+
+
+@with_db
+def clear_all_points(cursor, wins=False):
+    """Zero every user's points (and leaderboard wins) without archiving."""
+    if wins:
+        cursor.execute("UPDATE points SET points = 0, wins = 0;")
+    else:
+        cursor.execute("UPDATE points SET points = 0;")
+    cleared = cursor.rowcount
+    refresh_leaderboard()
+    return cleared
+
+
+@with_db
+def set_reset_interval(cursor, reset_interval):
+    cursor.execute("UPDATE reset SET reset_interval = %s;", (reset_interval,))
+    if cursor.rowcount == 0:
+        cursor.execute(
+            "INSERT INTO reset (last_reset, reset_interval) VALUES (%s, %s);",
+            (datetime.datetime.now(), reset_interval),
+        )
+    return True
+
+
 @with_db
 def get_admins(cursor):
     cursor.execute("SELECT discord_id FROM admins;")
@@ -270,19 +830,68 @@ def get_admins(cursor):
     return result if result else []
 
 
+# admin discord ids, reloaded from the admins table after ADMIN_CACHE_TTL
+_admin_ids = None
+_admin_ids_loaded_at = 0.0
+_admin_ids_generation = 0
+_admin_ids_lock = threading.Lock()
+
+
+def cached_admin_ids():
+    """The cached admin id set, or None if it is missing or expired."""
+    ttl = getattr(config, "ADMIN_CACHE_TTL", 300)
+    admins = _admin_ids
+    if admins is not None and time.monotonic() - _admin_ids_loaded_at < ttl:
+        return admins
+    return None
+
+
+def invalidate_admins():
+    global _admin_ids, _admin_ids_generation
+    with _admin_ids_lock:
+        _admin_ids = None
+        _admin_ids_generation += 1
+
+
+@uses_db
+def get_admin_ids():
+    global _admin_ids, _admin_ids_loaded_at
+    admins = cached_admin_ids()
+    if admins is not None:
+        return admins
+    generation = _admin_ids_generation
+    admins = frozenset(row[0] for row in get_admins())
+    with _admin_ids_lock:
+        # don't overwrite an invalidation that happened while we were loading
+        if generation == _admin_ids_generation:
+            _admin_ids = admins
+            _admin_ids_loaded_at = time.monotonic()
+    return admins
+
+
 @with_db
-def add_admin(cursor, discord_id):
+def _insert_admin(cursor, discord_id):
+    cursor.execute(
+        "INSERT INTO admins (discord_id) VALUES (%s);",
+        (discord_id,),
+    )
+
+
+@uses_db
+def add_admin(discord_id):
     try:
-        cursor.execute(
-            "INSERT INTO admins (discord_id) VALUES (%s);",
-            (discord_id,),
-        )
-        return True
+        _insert_admin(discord_id)
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         return False, str(e)
+    # only after the commit, or a concurrent get_admin_ids could cache the
+    # old set again
+    invalidate_admins()
+    return True, ""
 
 
-@with_db
+@with_db(read_only=True)
 def check_if_user_did_problem(cursor, discord_user, problem_name):
     leetcode_username = get_leetcode_from_discord(discord_user)
     cursor.execute(
@@ -371,7 +980,7 @@ def add_quit(cursor, discord_user):
     return updated_quits
 
 
-@with_db
+@with_db(read_only=True)
 def get_wins(cursor, discord_user):
     leetcode_username = get_leetcode_from_discord(discord_user)
     cursor.execute(
@@ -386,7 +995,7 @@ def get_wins(cursor, discord_user):
     return result[0] if result else 0
 
 
-@with_db
+@with_db(read_only=True)
 def get_losses(cursor, discord_user):
     leetcode_username = get_leetcode_from_discord(discord_user)
     cursor.execute(
@@ -401,7 +1010,7 @@ def get_losses(cursor, discord_user):
     return result[0] if result else 0
 
 
-@with_db
+@with_db(read_only=True)
 def get_quits(cursor, discord_user):
     leetcode_username = get_leetcode_from_discord(discord_user)
     cursor.execute(
@@ -416,7 +1025,7 @@ def get_quits(cursor, discord_user):
     return result[0] if result else 0
 
 
-@with_db
+@with_db(read_only=True)
 def get_user_challenge_stats(cursor, discord_user):
     leetcode_username = get_leetcode_from_discord(discord_user)
     cursor.execute(
@@ -431,25 +1040,217 @@ def get_user_challenge_stats(cursor, discord_user):
     return list(result) if result else [0, 0, 0]
 
 
+# The *_by_id functions below mirror the discord-name based challenge/points
+# API but are keyed by the immutable discord id (interaction.user.id).
+
+
+@with_db(read_only=True)
+def get_user_points_by_id(cursor, discord_id):
+    cursor.execute(
+        "SELECT points FROM points WHERE user_id = %s;", (get_user_id(discord_id),)
+    )
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+
+@with_db(read_only=True)
+def check_if_user_did_problem_by_id(cursor, discord_id, problem_name):
+    cursor.execute(
+        "SELECT * FROM user_submissions WHERE user_id = %s AND problem_name = %s;",
+        (get_user_id(discord_id), problem_name),
+    )
+    return cursor.fetchall()
+
+
+solved = SolvedIndex()
+
+# submission ids are handed out before commit, so a row can become visible
+# after a higher id was already synced; re-reading a few ids catches those
+_SOLVED_SYNC_OVERLAP = 100
+
+
+@with_db(read_only=True)
+def sync_solved(cursor, full=False):
+    """Add user_submissions rows written since the last sync to the solved
+    index. Everything is reloaded on the first call, with `full`, and every
+    SOLVED_RELOAD_MINUTES so deleted submissions drop out. Returns the number
+    of rows read."""
+    max_age = getattr(config, "SOLVED_RELOAD_MINUTES", 60) * 60
+    if full or not solved.loaded or time.time() - solved.loaded_at >= max_age:
+        cursor.execute("SELECT id, user_id, problem_name FROM user_submissions;")
+        rows = cursor.fetchall()
+        solved.load(rows)
+        return len(rows)
+    cursor.execute(
+        "SELECT id, user_id, problem_name FROM user_submissions WHERE id > %s ORDER BY id;",
+        (max(0, solved.last_id - _SOLVED_SYNC_OVERLAP),),
+    )
+    rows = cursor.fetchall()
+    solved.add(rows)
+    return len(rows)
+
+
+@with_db(read_only=True)
+def get_submissions(cursor, pairs):
+    """user_submissions rows for (user_id, problem_name) pairs, as a dict of
+    pair -> rows in id order. Pairs without rows are left out."""
+    pairs = set(pairs)
+    cursor.execute(
+        "SELECT * FROM user_submissions WHERE user_id = ANY(%s) AND problem_name = ANY(%s) ORDER BY id;",
+        (
+            sorted({user_id for user_id, _ in pairs}),
+            sorted({title for _, title in pairs}),
+        ),
+    )
+    rows = {}
+    for row in cursor.fetchall():
+        if (row[1], row[2]) in pairs:
+            rows.setdefault((row[1], row[2]), []).append(row)
+    return rows
+
+
+@with_db(read_only=True)
+def get_challenge_submissions(cursor, pairs):
+    """user_submissions rows for (discord_id, problem_name) pairs, as a dict
+    of pair -> rows in id order ([] if there are none). Syncs the solved index
+    first and only queries the pairs it has a submission for."""
+    sync_solved()
+    user_ids = {discord_id: get_user_id(discord_id) for discord_id, _ in pairs}
+    solved_pairs = {
+        (user_ids[discord_id], title)
+        for discord_id, title in pairs
+        if solved.has_solved(user_ids[discord_id], title)
+    }
+    rows = get_submissions(solved_pairs) if solved_pairs else {}
+    return {
+        (discord_id, title): rows.get((user_ids[discord_id], title), [])
+        for discord_id, title in pairs
+    }
+
+
+@uses_db
+def get_solved(discord_ids):
+    """The problems any of `discord_ids` has solved, as a SolvedSet; a title
+    not `in` it is unsolved by all of them."""
+    if not solved.loaded:
+        sync_solved()
+    return solved.solved_by(*(get_user_id(discord_id) for discord_id in discord_ids))
+
+
 @with_db
-def add_bookmark(cursor, discord_id, problem_url):
-    try:
-        match = re.search(r"/problems/([^/]+)/?", problem_url)
-        if not match:
-            return False, "❌ Could not extract a valid problem slug from the URL"
+def check_if_user_busy_by_id(cursor, discord_id):
+    user_id = get_user_id(discord_id)
+    cursor.execute("SELECT busy FROM challenge WHERE id = %s;", (user_id,))
+    result = cursor.fetchall()
+    if result == []:
+        cursor.execute(
+            "INSERT INTO challenge (id, wins, losses, quits, busy) VALUES (%s, 0, 0, 0, false);",
+            (user_id,),
+        )
+        return False
+    return result[0][0]
+
+
+@with_db
+def set_user_busy_by_id(cursor, discord_id, busy=True):
+    cursor.execute(
+        "UPDATE challenge SET busy = %s WHERE id = %s;",
+        (busy, get_user_id(discord_id)),
+    )
+    return True
 
-        slug = match.group(1)
 
-        check_url = f"https://leetcode.server.rakibshahid.com/select?titleSlug={slug}"
-        response = requests.get(check_url)
+@with_db
+def set_users_busy_by_id(cursor, discord_ids, busy=True):
+    """set_user_busy_by_id for several players in one transaction."""
+    for discord_id in discord_ids:
+        set_user_busy_by_id(discord_id, busy=busy)
+    return True
+
+
+@with_db
+def add_win_by_id(cursor, discord_id):
+    cursor.execute(
+        "UPDATE challenge SET wins = wins + 1 WHERE id = %s RETURNING wins;",
+        (get_user_id(discord_id),),
+    )
+    return cursor.fetchone()[0]
+
+
+@with_db
+def add_loss_by_id(cursor, discord_id):
+    cursor.execute(
+        "UPDATE challenge SET losses = losses + 1 WHERE id = %s RETURNING losses;",
+        (get_user_id(discord_id),),
+    )
+    return cursor.fetchone()[0]
+
+
+@with_db
+def add_quit_by_id(cursor, discord_id):
+    cursor.execute(
+        "UPDATE challenge SET quits = quits + 1 WHERE id = %s RETURNING quits;",
+        (get_user_id(discord_id),),
+    )
+    return cursor.fetchone()[0]
+
 
-        if response.status_code != 200:
-            return False, f"Failed to validate slug (HTTP {response.status_code})"
+@with_db(read_only=True)
+def get_user_challenge_stats_by_id(cursor, discord_id):
+    cursor.execute(
+        "SELECT wins, losses, quits FROM challenge WHERE id = %s;",
+        (get_user_id(discord_id),),
+    )
+    result = cursor.fetchone()
+    return list(result) if result else [0, 0, 0]
+
+
+# outcome -> (wins for the winner, losses for the loser, quits for the loser)
+_SETTLE_DELTAS = {
+    "win": (1, 1, 0),
+    "draw": (0, 0, 0),
+    "quit": (1, 0, 1),
+}
+
+
+@with_db
+def settle_challenge(cursor, winner_id, loser_id, outcome="win"):
+    """Clear both players' busy flag and apply the result in one statement.
+    Players are discord ids; for "quit" the loser is the one who quit.
+    Returns ([wins, losses, quits] of winner, [wins, losses, quits] of loser)."""
+    wins, losses, quits = _SETTLE_DELTAS[outcome]
+    cursor.execute(
+        """
+        WITH players AS (
+            SELECT id, discord_id FROM users WHERE discord_id IN (%(winner)s, %(loser)s)
+        )
+        UPDATE challenge
+        SET busy = false,
+            wins = wins + CASE WHEN id = (SELECT id FROM players WHERE discord_id = %(winner)s) THEN %(wins)s ELSE 0 END,
+            losses = losses + CASE WHEN id = (SELECT id FROM players WHERE discord_id = %(loser)s) THEN %(losses)s ELSE 0 END,
+            quits = quits + CASE WHEN id = (SELECT id FROM players WHERE discord_id = %(loser)s) THEN %(quits)s ELSE 0 END
+        WHERE id IN (SELECT id FROM players)
+        RETURNING (SELECT discord_id FROM players WHERE players.id = challenge.id), wins, losses, quits;
+        """,
+        {
+            "winner": winner_id,
+            "loser": loser_id,
+            "wins": wins,
+            "losses": losses,
+            "quits": quits,
+        },
+    )
+    stats = {row[0]: list(row[1:]) for row in cursor.fetchall()}
+    return (
+        stats.get(int(winner_id), [0, 0, 0]),
+        stats.get(int(loser_id), [0, 0, 0]),
+    )
 
-        json_data = response.json()
-        if not json_data:
-            return False, f"❌ `{slug}` is not a valid LeetCode problem"
 
+@with_db
+def add_bookmark(cursor, discord_id, slug):
+    # asyncdb.add_bookmark validates the problem URL before calling this
+    try:
         cursor.execute("SELECT id FROM users WHERE discord_id = %s;", (discord_id,))
         user_row = cursor.fetchone()
         if not user_row:
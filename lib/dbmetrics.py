@@ -0,0 +1,127 @@
+import collections
+import threading
+import time
+import config
+
+PHASES = ("connect", "execute", "commit")
+
+
+class Histogram:
+    """Latency samples over a rolling window, plus lifetime count and errors."""
+
+    def __init__(self, window):
+        self._samples = collections.deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentiles(self, *ps):
+        samples = sorted(self._samples)
+        if not samples:
+            return tuple(0.0 for _ in ps)
+        return tuple(
+            samples[min(len(samples) - 1, int(p / 100 * len(samples)))] for p in ps
+        )
+
+
+_lock = threading.Lock()
+_histograms = {}  # (function name, phase) -> Histogram
+_slow_queries = collections.deque(maxlen=getattr(config, "DB_SLOW_QUERY_LOG_SIZE", 50))
+
+
+def _histogram(name, phase):
+    key = (name, phase)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = Histogram(
+            getattr(config, "DB_METRICS_WINDOW", 1000)
+        )
+    return histogram
+
+
+def observe(name, phase, seconds):
+    with _lock:
+        _histogram(name, phase).observe(seconds)
+
+
+def record_error(name):
+    with _lock:
+        _histogram(name, "execute").errors += 1
+
+
+def redact(params):
+    """Keep the shape of bind parameters but not their values."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: redact(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return type(params)(redact(value) for value in params)
+    if isinstance(params, str):
+        return f"<str:{len(params)}>"
+    return f"<{type(params).__name__}>"
+
+
+def record_statement(name, sql, params, seconds):
+    """Log a statement to the slow query log if it took longer than
+    DB_SLOW_QUERY_MS."""
+    threshold = getattr(config, "DB_SLOW_QUERY_MS", 200)
+    if seconds * 1000 < threshold:
+        return
+    if isinstance(sql, bytes):
+        sql = sql.decode(errors="replace")
+    sql = " ".join(str(sql).split())
+    params = redact(params)
+    print(f"[SLOW] {name} took {seconds * 1000:.1f}ms: {sql} {params}")
+    with _lock:
+        _slow_queries.append((time.time(), name, seconds, sql, params))
+
+
+def snapshot():
+    """Rows of (function, phase, count, errors, p50, p95, p99) with
+    latencies in milliseconds."""
+    with _lock:
+        items = list(_histograms.items())
+    rows = []
+    for (name, phase), histogram in sorted(items):
+        p50, p95, p99 = histogram.percentiles(50, 95, 99)
+        rows.append(
+            (
+                name,
+                phase,
+                histogram.count,
+                histogram.errors,
+                p50 * 1000,
+                p95 * 1000,
+                p99 * 1000,
+            )
+        )
+    return rows
+
+
+def slow_queries():
+    with _lock:
+        return list(_slow_queries)
+
+
+def format_table(rows):
+    header = ("function", "phase", "count", "errors", "p50", "p95", "p99")
+    lines = [
+        f"{header[0]:<32}{header[1]:<9}{header[2]:>7}{header[3]:>7}"
+        f"{header[4]:>9}{header[5]:>9}{header[6]:>9}"
+    ]
+    for name, phase, count, errors, p50, p95, p99 in rows:
+        lines.append(
+            f"{name[:31]:<32}{phase:<9}{count:>7}{errors:>7}"
+            f"{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _slow_queries.clear()
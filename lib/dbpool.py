@@ -0,0 +1,178 @@
+import threading
+import time
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class DBPool:
+    """Bounded, thread-safe pool of connections. `connect` opens a new one;
+    connections must follow the psycopg2 connection interface."""
+
+    def __init__(
+        self, min_size, max_size, timeout, health_check_idle, max_idle, connect
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Invalid pool size min={min_size} max={max_size}")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_idle = health_check_idle
+        self.max_idle = max_idle
+        self._connect = connect
+
+        self._cond = threading.Condition()
+        self._idle = []  # [(connection, returned_at)]
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._health_failures = 0
+        self._peak_overflow = 0
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._open += 1
+
+    def _healthy(self, connection, idle_for):
+        if connection.closed:
+            return False
+        if idle_for < self.health_check_idle:
+            return True
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.close()
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        connection = None
+        returned_at = None
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    self._peak_overflow = max(
+                        self._peak_overflow, self._open - self.min_size
+                    )
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s"
+                    )
+                waited = True
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                wait = time.monotonic() - start
+                self._waits += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+        try:
+            if connection is not None and not self._healthy(
+                connection, time.monotonic() - returned_at
+            ):
+                with self._cond:
+                    self._health_failures += 1
+                self._close_quietly(connection)
+                connection = None
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return connection
+
+    def putconn(self, connection, discard=False):
+        if not discard and not connection.closed:
+            status = connection.get_transaction_status()
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except Exception:
+                    discard = True
+        discard = discard or bool(connection.closed)
+
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._open -= 1
+            else:
+                self._idle.append((connection, now))
+            # overflow connections are closed once they sit idle for max_idle
+            # (oldest first; the idle list is used LIFO)
+            while (
+                self._open > self.min_size
+                and self._idle
+                and now - self._idle[0][1] >= self.max_idle
+            ):
+                expired.append(self._idle.pop(0)[0])
+                self._open -= 1
+            self._cond.notify()
+        if discard:
+            self._close_quietly(connection)
+        for stale in expired:
+            self._close_quietly(stale)
+
+    def closeall(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "overflow": max(0, self._open - self.min_size),
+                "peak_overflow": self._peak_overflow,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "avg_wait_ms": (
+                    self._wait_total / self._waits * 1000 if self._waits else 0.0
+                ),
+                "max_wait_ms": self._wait_max * 1000,
+                "timeouts": self._timeouts,
+                "health_check_failures": self._health_failures,
+            }
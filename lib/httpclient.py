@@ -0,0 +1,63 @@
+"""Shared aiohttp session for upstream HTTP calls (LC_SERVER_URL, SERVER_URL).
+
+The session is opened in the bot's setup_hook and closed on shutdown. Its
+connector keeps connections alive between calls, caps connections per host
+and caches DNS lookups, and every request gets the default timeouts unless
+it passes its own, e.g.
+
+    data = await httpclient.get_json(f"{config.LC_SERVER_URL}/daily")
+"""
+
+import aiohttp
+import config
+
+_session = None
+
+
+async def start():
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=getattr(config, "HTTP_POOL_SIZE", 100),
+            limit_per_host=getattr(config, "HTTP_POOL_PER_HOST", 10),
+            ttl_dns_cache=getattr(config, "HTTP_DNS_CACHE_SECONDS", 300),
+            keepalive_timeout=getattr(config, "HTTP_KEEPALIVE_SECONDS", 30),
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=getattr(config, "HTTP_TIMEOUT", 10),
+                connect=getattr(config, "HTTP_CONNECT_TIMEOUT", 5),
+            ),
+        )
+    return _session
+
+
+def session():
+    if _session is None or _session.closed:
+        raise RuntimeError("HTTP session is not open, call httpclient.start() first")
+    return _session
+
+
+async def close():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def get_json(url, **kwargs):
+    """GET `url` and return the decoded JSON body. Raises
+    aiohttp.ClientResponseError for non-2xx responses."""
+    async with session().get(url, **kwargs) as response:
+        response.raise_for_status()
+        return await response.json(content_type=None)
+
+
+async def fetch_json(url, **kwargs):
+    """GET `url` and return (status, decoded JSON body or None). The body is
+    only decoded for 200 responses."""
+    async with session().get(url, **kwargs) as response:
+        if response.status != 200:
+            return response.status, None
+        return response.status, await response.json(content_type=None)
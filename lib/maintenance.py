@@ -2,6 +2,7 @@ from discord import app_commands
 from discord import Interaction
 from discord.embeds import Embed
 from discord.app_commands import CheckFailure
+import lib.dbfuncs as dbfuncs
 
 MAINTENANCE_COMMANDS = {
     # "challenge",
@@ -14,6 +15,24 @@ class MaintenanceCheckFailure(CheckFailure):
     pass
 
 
+def degraded_embed():
+    return Embed(
+        title="⚠️ Database Unavailable",
+        description="The leaderboard database is not responding right now. "
+        "Please try again in a minute.",
+        color=0xE74C3C,
+    )
+
+
+async def send_degraded(interaction: Interaction):
+    """Tell the user the database is down, whether or not the interaction was
+    already deferred or answered."""
+    if interaction.response.is_done():
+        await interaction.followup.send(embed=degraded_embed(), ephemeral=True)
+    else:
+        await interaction.response.send_message(embed=degraded_embed(), ephemeral=True)
+
+
 def maintenance_check():
     async def predicate(interaction: Interaction) -> bool:
         cmd = interaction.command.name
@@ -28,6 +47,10 @@ def maintenance_check():
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
             raise MaintenanceCheckFailure()
+        # fail fast instead of letting the command time out on a dead database
+        if dbfuncs.breaker.state == "open":
+            await send_degraded(interaction)
+            raise MaintenanceCheckFailure()
         return True
 
     return app_commands.check(predicate)
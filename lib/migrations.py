@@ -0,0 +1,273 @@
+"""Schema migrations and query plan checks.
+
+    python -m lib.migrations status
+    python -m lib.migrations upgrade
+    python -m lib.migrations check [--threshold ROWS]
+
+Migrations are the numbered files in migrations/ (NNNN_name.sql), applied in
+order, each in its own transaction, and recorded in schema_migrations. A
+NNNN_name.<backend>.sql file (e.g. .sqlite.sql) replaces NNNN_name.sql on that
+DB_BACKEND.
+
+`check` runs EXPLAIN on every SQL statement in lib/dbfuncs.py and the cogs
+(with parameters left generic) and fails if any plan sequentially scans a
+table with more than ROWS rows, or if a statement does not compile. Functions
+that read a whole table on purpose are listed in FULL_SCANS.
+"""
+
+import argparse
+import ast
+import json
+import re
+import sys
+from pathlib import Path
+import lib.dbfuncs as dbfuncs
+import config
+
+ROOT = Path(__file__).resolve().parent.parent
+MIGRATIONS_DIR = ROOT / "migrations"
+QUERY_SOURCES = [ROOT / "lib" / "dbfuncs.py", *sorted((ROOT / "cogs").glob("*.py"))]
+
+_MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+?)(?:\.(postgres|sqlite))?\.sql$")
+_SQL_START = re.compile(r"^\s*(SELECT|INSERT INTO|UPDATE|DELETE FROM|WITH)\s")
+_PARAM = re.compile(r"%\((\w+)\)s|%s")
+
+# function -> tables its statements are meant to scan in full
+FULL_SCANS = {
+    # bulk loads behind the in-memory caches
+    "load_registry": {"users"},
+    "load_difficulties": {"difficulty"},
+    "sync_solved": {"user_submissions"},
+    # the end-of-period reset updates every points row
+    "run_reset": {"points"},
+    "clear_all_points": {"points"},
+}
+# on SQLite the leaderboard is a plain view, computed from every user on read
+SQLITE_FULL_SCANS = {
+    "get_leaderboard": {"users", "points"},
+}
+
+
+def discover_migrations(backend=None):
+    backend = backend or dbfuncs.get_backend().name
+    migrations = {}
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = _MIGRATION_FILE.match(path.name)
+        if not match or match.group(3) not in (None, backend):
+            continue
+        version = int(match.group(1))
+        # a backend-specific file wins over the generic one
+        if version not in migrations or match.group(3):
+            migrations[version] = (version, match.group(2), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+@dbfuncs.with_db
+def applied_migrations(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+    cursor.execute("SELECT version FROM schema_migrations;")
+    return {row[0] for row in cursor.fetchall()}
+
+
+@dbfuncs.with_db
+def _apply_migration(cursor, version, name, sql):
+    dbfuncs.get_backend().execute_script(cursor, sql)
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+        (version, name),
+    )
+
+
+def upgrade():
+    applied = applied_migrations()
+    pending = [m for m in discover_migrations() if m[0] not in applied]
+    for version, name, path in pending:
+        print(f"[MIGRATE] Applying {path.name}")
+        _apply_migration(version, name, path.read_text())
+    return [path.name for _, _, path in pending]
+
+
+def status():
+    applied = applied_migrations()
+    return [
+        (path.name, version in applied) for version, _, path in discover_migrations()
+    ]
+
+
+def _statements(node, function=None):
+    """(string literal, name of the enclosing function) for every literal
+    below `node` that looks like a statement."""
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield from _statements(child, child.name)
+        elif (
+            isinstance(child, ast.Constant)
+            and isinstance(child.value, str)
+            and _SQL_START.match(child.value)
+        ):
+            yield child, function
+        else:
+            yield from _statements(child, function)
+
+
+def collect_queries(paths=QUERY_SOURCES):
+    """Every string literal in the given modules that looks like a statement,
+    as (location, function, sql) tuples."""
+    queries = []
+    for path in paths:
+        tree = ast.parse(path.read_text(), filename=str(path))
+        for node, function in _statements(tree):
+            location = f"{path.relative_to(ROOT)}:{node.lineno}"
+            queries.append((location, function, " ".join(node.value.split())))
+    return queries
+
+
+def _full_scans(function, backend):
+    allowed = set(FULL_SCANS.get(function, ()))
+    if backend == "sqlite":
+        allowed |= SQLITE_FULL_SCANS.get(function, set())
+    return allowed
+
+
+def _to_prepared(sql):
+    """Rewrite psycopg2 placeholders to $n and return (sql, parameter count)."""
+    numbers = {}
+
+    def number(match):
+        key = match.group(1) or len(numbers)
+        if key not in numbers:
+            numbers[key] = len(numbers) + 1
+        return f"${numbers[key]}"
+
+    return _PARAM.sub(number, sql).rstrip().rstrip(";"), len(numbers)
+
+
+def _seq_scans(plan):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+def check_plans(threshold):
+    """Return (location, problem) pairs for queries that seq scan a table with
+    more than `threshold` rows or that could not be explained."""
+    conn = dbfuncs.DBConnection()
+    try:
+        if dbfuncs.get_backend().name == "sqlite":
+            return _check_sqlite_plans(conn, threshold)
+        return _check_postgres_plans(conn, threshold)
+    finally:
+        conn.close()
+
+
+def _check_postgres_plans(conn, threshold):
+    problems = []
+    cursor = conn.cursor
+    for i, (location, function, sql) in enumerate(collect_queries()):
+        allowed = _full_scans(function, "postgres")
+        prepared, param_count = _to_prepared(sql)
+        args = ", ".join(["NULL"] * param_count)
+        try:
+            cursor.execute("SET LOCAL plan_cache_mode = force_generic_plan;")
+            cursor.execute(f"PREPARE dbfuncs_check_{i} AS {prepared};")
+            cursor.execute(
+                f"EXPLAIN (FORMAT JSON) EXECUTE dbfuncs_check_{i}"
+                + (f"({args});" if param_count else ";")
+            )
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            for relation in set(_seq_scans(plan[0]["Plan"])) - allowed:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s;",
+                    (relation,),
+                )
+                rows = cursor.fetchone()[0]
+                if rows > threshold:
+                    problems.append(
+                        (location, f"seq scan on {relation} (~{int(rows)} rows)")
+                    )
+        except dbfuncs.get_backend().Error as e:
+            problems.append(
+                (location, f"could not explain: {getattr(e, 'pgerror', None) or e}")
+            )
+        finally:
+            conn.connection.rollback()
+            cursor.execute("DEALLOCATE ALL;")
+            conn.connection.rollback()
+    return problems
+
+
+def _check_sqlite_plans(conn, threshold):
+    problems = []
+    cursor = conn.cursor
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table';")
+    tables = {row[0] for row in cursor.fetchall()}
+    for location, function, sql in collect_queries():
+        allowed = _full_scans(function, "sqlite")
+        names = set(_PARAM.findall(sql)) - {""}
+        if names:
+            params = dict.fromkeys(names)
+        else:
+            params = (None,) * len(_PARAM.findall(sql))
+        try:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            # detail is e.g. "SCAN users" or "SEARCH users USING INDEX ..."
+            scanned = {
+                detail.split()[1]
+                for _, _, _, detail in cursor.fetchall()
+                if detail.startswith("SCAN ")
+            }
+            for relation in (scanned & tables) - allowed:
+                cursor.execute(f'SELECT COUNT(*) FROM "{relation}";')
+                rows = cursor.fetchone()[0]
+                if rows > threshold:
+                    problems.append((location, f"seq scan on {relation} ({rows} rows)"))
+        except dbfuncs.get_backend().Error as e:
+            problems.append((location, f"could not explain: {e}"))
+        finally:
+            conn.connection.rollback()
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lib.migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list migrations and whether they ran")
+    commands.add_parser("upgrade", help="apply pending migrations")
+    check = commands.add_parser("check", help="EXPLAIN every dbfuncs query")
+    check.add_argument(
+        "--threshold",
+        type=int,
+        default=getattr(config, "EXPLAIN_SEQSCAN_ROWS", 1000),
+        help="fail on seq scans over tables with more rows than this",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        for name, applied in status():
+            print(f"[{'x' if applied else ' '}] {name}")
+    elif args.command == "upgrade":
+        applied = upgrade()
+        print(f"Applied {len(applied)} migration(s)")
+    elif args.command == "check":
+        problems = check_plans(args.threshold)
+        for location, problem in problems:
+            print(f"{location}: {problem}")
+        if problems:
+            return 1
+        print("All query plans OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import threading
+import time
+
+
+def _key(value):
+    return value.lower() if isinstance(value, str) else None
+
+
+def _discord_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class UserRegistry:
+    """In-memory copy of the users table indexed by discord id, discord name
+    and leetcode username. Rows are kept exactly as `SELECT * FROM users`
+    returns them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = {}
+        self._by_discord_id = {}
+        self._by_discord_name = {}
+        self._by_leetcode = {}
+        self.loaded_at = None
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def __len__(self):
+        return len(self._by_leetcode)
+
+    def load(self, columns, rows):
+        columns = {name: i for i, name in enumerate(columns)}
+        by_discord_id, by_discord_name, by_leetcode = {}, {}, {}
+        for row in rows:
+            self._index(columns, row, by_discord_id, by_discord_name, by_leetcode)
+        with self._lock:
+            self._columns = columns
+            self._by_discord_id = by_discord_id
+            self._by_discord_name = by_discord_name
+            self._by_leetcode = by_leetcode
+            self.loaded_at = time.time()
+
+    def _index(self, columns, row, by_discord_id, by_discord_name, by_leetcode):
+        discord_id = _discord_id(row[columns["discord_id"]])
+        if discord_id is not None:
+            by_discord_id[discord_id] = row
+        discord_name = _key(row[columns["discord_name"]])
+        if discord_name is not None:
+            by_discord_name[discord_name] = row
+        by_leetcode[_key(row[columns["username"]])] = row
+
+    def _unindex(self, row):
+        discord_id = _discord_id(self.value(row, "discord_id"))
+        if self._by_discord_id.get(discord_id) is row:
+            del self._by_discord_id[discord_id]
+        discord_name = _key(self.value(row, "discord_name"))
+        if self._by_discord_name.get(discord_name) is row:
+            del self._by_discord_name[discord_name]
+        leetcode = _key(self.value(row, "username"))
+        if self._by_leetcode.get(leetcode) is row:
+            del self._by_leetcode[leetcode]
+
+    def upsert(self, columns, row):
+        with self._lock:
+            if not self._columns:
+                self._columns = {name: i for i, name in enumerate(columns)}
+            old = self._by_leetcode.get(_key(row[self._columns["username"]]))
+            if old is not None:
+                self._unindex(old)
+            self._index(
+                self._columns,
+                row,
+                self._by_discord_id,
+                self._by_discord_name,
+                self._by_leetcode,
+            )
+
+    def remove(self, discord_id):
+        with self._lock:
+            row = self._by_discord_id.get(_discord_id(discord_id))
+            if row is not None:
+                self._unindex(row)
+            return row
+
+    def rename(self, discord_id, discord_name):
+        with self._lock:
+            row = self._by_discord_id.get(_discord_id(discord_id))
+            if row is None:
+                return
+            self._unindex(row)
+            row = list(row)
+            row[self._columns["discord_name"]] = discord_name
+            row = tuple(row)
+            self._index(
+                self._columns,
+                row,
+                self._by_discord_id,
+                self._by_discord_name,
+                self._by_leetcode,
+            )
+
+    def value(self, row, column):
+        return row[self._columns[column]]
+
+    def by_discord_id(self, discord_id):
+        return self._by_discord_id.get(_discord_id(discord_id))
+
+    def by_discord_name(self, discord_name):
+        return self._by_discord_name.get(_key(discord_name))
+
+    def by_leetcode(self, leetcode_username):
+        return self._by_leetcode.get(_key(leetcode_username))
@@ -0,0 +1,105 @@
+import threading
+import time
+
+
+class SolvedSet:
+    """The problems solved by one or more users, as a bitset. Supports `in`
+    with a problem title, len() and iteration over titles."""
+
+    def __init__(self, index, bits):
+        self._index = index
+        self.bits = bits
+
+    def __contains__(self, title):
+        bit = self._index.bit_of(title)
+        return bit is not None and (self.bits >> bit) & 1 == 1
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __iter__(self):
+        return iter(self._index.titles(self.bits))
+
+
+class SolvedIndex:
+    """In-memory copy of user_submissions: one int bitset per users.id with
+    a bit set for every problem that user has a submission for. Problems are
+    identified by title, as user_submissions stores them, and each title gets
+    its bit the first time it is seen, so bitsets of different users can be
+    combined with | and &.
+
+    `last_id` is the highest user_submissions.id applied so far, so new
+    submissions can be added without reloading everything."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bits = {}  # title -> bit position
+        self._titles = []  # bit position -> title
+        self._solved = {}  # users.id -> bitset
+        self.last_id = 0
+        self.loaded_at = None
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def __len__(self):
+        return len(self._solved)
+
+    def _bit(self, title):
+        bit = self._bits.get(title)
+        if bit is None:
+            bit = self._bits[title] = len(self._titles)
+            self._titles.append(title)
+        return bit
+
+    def _apply(self, solved, rows):
+        last_id = 0
+        for row_id, user_id, title in rows:
+            solved[user_id] = solved.get(user_id, 0) | (1 << self._bit(title))
+            last_id = max(last_id, row_id)
+        return last_id
+
+    def load(self, rows):
+        """Replace the index with (id, user_id, title) rows."""
+        with self._lock:
+            solved = {}
+            last_id = self._apply(solved, rows)
+            self._solved = solved
+            self.last_id = last_id
+            self.loaded_at = time.time()
+
+    def add(self, rows):
+        """Add (id, user_id, title) rows. Rows that were already applied are
+        harmless, so callers can overlap their reads."""
+        with self._lock:
+            self.last_id = max(self.last_id, self._apply(self._solved, rows))
+
+    def remove_user(self, user_id):
+        with self._lock:
+            self._solved.pop(user_id, None)
+
+    def bit_of(self, title):
+        return self._bits.get(title)
+
+    def titles(self, bits):
+        titles = self._titles
+        out = []
+        while bits:
+            low = bits & -bits
+            out.append(titles[low.bit_length() - 1])
+            bits ^= low
+        return out
+
+    def solved_by(self, *user_ids):
+        """Problems solved by any of `user_ids`; everything outside it is
+        unsolved by all of them."""
+        bits = 0
+        solved = self._solved
+        for user_id in user_ids:
+            bits |= solved.get(user_id, 0)
+        return SolvedSet(self, bits)
+
+    def has_solved(self, user_id, title):
+        bit = self._bits.get(title)
+        return bit is not None and (self._solved.get(user_id, 0) >> bit) & 1 == 1
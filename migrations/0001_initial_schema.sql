@@ -0,0 +1,69 @@
+-- Tables used by lib/dbfuncs.py. Everything is IF NOT EXISTS so this is a
+-- no-op against a database that predates the migrations.
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    discord_id BIGINT,
+    discord_name TEXT
+);
+
+CREATE TABLE IF NOT EXISTS points (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id),
+    points DOUBLE PRECISION NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS queries (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id),
+    discord_id BIGINT,
+    queries INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS last_completed (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id),
+    problem_name TEXT,
+    completed_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_submissions (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    problem_name TEXT NOT NULL,
+    submitted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS difficulty (
+    titleslug TEXT PRIMARY KEY,
+    points INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reset (
+    last_reset TIMESTAMP NOT NULL,
+    reset_interval INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS admins (
+    discord_id BIGINT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS challenge (
+    id INTEGER PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    quits INTEGER NOT NULL DEFAULT 0,
+    busy BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS win_history (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS bookmarks (
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    problem_slug TEXT NOT NULL,
+    saved_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, problem_slug)
+);
@@ -0,0 +1,15 @@
+-- Indexes matching the predicates of the hot dbfuncs queries. The expression
+-- indexes must stay in sync with the LOWER(...) comparisons in lib/dbfuncs.py
+-- or the planner will not use them.
+
+CREATE INDEX IF NOT EXISTS users_lower_username_idx ON users (LOWER(username));
+CREATE INDEX IF NOT EXISTS users_lower_discord_name_idx ON users (LOWER(discord_name));
+CREATE INDEX IF NOT EXISTS users_discord_id_idx ON users (discord_id);
+
+CREATE INDEX IF NOT EXISTS user_submissions_user_problem_idx
+    ON user_submissions (user_id, problem_name);
+
+CREATE INDEX IF NOT EXISTS bookmarks_user_saved_at_idx
+    ON bookmarks (user_id, saved_at DESC);
+
+CREATE INDEX IF NOT EXISTS win_history_timestamp_idx ON win_history (timestamp DESC);
@@ -0,0 +1,7 @@
+-- /bookmarks pages through a user's bookmarks by (saved_at, problem_slug)
+-- keyset instead of OFFSET; this index covers both the seek and the order.
+
+CREATE INDEX IF NOT EXISTS bookmarks_user_saved_at_slug_idx
+    ON bookmarks (user_id, saved_at DESC, problem_slug DESC);
+
+DROP INDEX IF EXISTS bookmarks_user_saved_at_idx;
@@ -0,0 +1,18 @@
+-- Leaderboard served to /top10 by dbfuncs.get_leaderboard and get_rank.
+-- Refreshed with REFRESH MATERIALIZED VIEW CONCURRENTLY (see
+-- dbfuncs.refresh_leaderboard), which needs the unique index on user_id.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS leaderboard AS
+SELECT
+    users.id AS user_id,
+    users.username,
+    users.discord_id,
+    users.discord_name,
+    points.points,
+    points.wins,
+    RANK() OVER (ORDER BY points.points DESC) AS rank
+FROM users
+JOIN points ON points.user_id = users.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS leaderboard_user_id_idx ON leaderboard (user_id);
+CREATE INDEX IF NOT EXISTS leaderboard_rank_idx ON leaderboard (rank, username);
@@ -0,0 +1,14 @@
+-- SQLite version of 0004_leaderboard_view.sql. SQLite has no materialized
+-- views, so this is a plain view and refresh_leaderboard is a no-op.
+
+CREATE VIEW IF NOT EXISTS leaderboard AS
+SELECT
+    users.id AS user_id,
+    users.username,
+    users.discord_id,
+    users.discord_name,
+    points.points,
+    points.wins,
+    RANK() OVER (ORDER BY points.points DESC) AS rank
+FROM users
+JOIN points ON points.user_id = users.id;
@@ -0,0 +1,11 @@
+-- Final standings of every finished leaderboard period, written by
+-- dbfuncs.run_reset before points are zeroed.
+
+CREATE TABLE IF NOT EXISTS points_history (
+    period_end TIMESTAMP NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    points DOUBLE PRECISION NOT NULL,
+    wins INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (period_end, user_id)
+);
@@ -2,7 +2,8 @@ import typing
 import discord
 from discord.ext import commands
 from discord import app_commands
-import lib.dbfuncs as dbfuncs
+import lib.asyncdb as asyncdb
+from lib.admin import admin_check
 
 
 class Adminclear(commands.Cog):
@@ -18,24 +19,19 @@ class Adminclear(commands.Cog):
         description="clear the ENTIRE leaderboard (points and wins) (ADMIN ONLY)",
     )
     @app_commands.describe(confirmation="type CONFIRM to confirm a clear")
+    @admin_check()
     async def Adminclear(
         self,
         interaction: discord.Interaction,
         confirmation: typing.Optional[str],
     ):
         await interaction.response.defer()
-        admins = dbfuncs.get_admins()
-        admins = set([admin[0] for admin in admins])
-        if interaction.user.id in admins:
-            if confirmation != "CONFIRM":
-                await interaction.followup.send("No confirmation, clear cancelled")
-                return
-            else:
-                dbfuncs.CLEAR_ALL_POINTS(wins=True)
-                await interaction.followup.send("Leaderboard has been cleared")
-
+        if confirmation != "CONFIRM":
+            await interaction.followup.send("No confirmation, clear cancelled")
+            return
         else:
-            await interaction.followup.send("You are not an admin")
+            await asyncdb.clear_all_points(wins=True)
+            await interaction.followup.send("Leaderboard has been cleared")
 
 
 async def setup(bot):